@@ -1,21 +1,52 @@
 import httplib2
 import json
+import os
+import socket
+import tempfile
+import threading
+import time
 
 from apiclient import discovery
+from googleapiclient.errors import HttpError
 from oauth2client.client import GoogleCredentials
 from oauth2client.client import SignedJwtAssertionCredentials
 from types import ListType
 
+from .batch import Batch
+from .discovery_cache import DiscoveryCache
 from .errors import MethodNameError
 from .errors import ResourceNameError
+from .registry import registry
+from .retry import RetryPolicy
+from .transport import ThreadLocalHttp
 
 class GoogleApiClient(object):
 
+    API_NAME = None
+    API_VERSION = None
+
     def __init__(self, **options):
         self.service_account = options.get('service_account')
         self.private_key = options.get('private_key')
         self.project_id = options.get('project_id')
         self.scope = options.get('scope')
+        self.http = options.get('http')
+        self.http_timeout = options.get('http_timeout')
+        self.retry = options.get('retry', RetryPolicy())
+        self.shared = options.get('shared', True)
+        self.before_hooks = []
+        self.after_hooks = []
+        self.credentials = options.get('credentials')
+        self.authorized_credentials = None
+        self.methods = None
+        self.build_lock = threading.Lock()
+        if 'discovery_cache' in options:
+            self.discovery_cache = options['discovery_cache']
+        else:
+            self.discovery_cache = DiscoveryCache(
+                directory=options.get('discovery_cache_dir'),
+                ttl=options.get('discovery_cache_ttl', DiscoveryCache.TTL)
+            )
 
     def auth_using_gcloud(self):
         self.credentials = GoogleCredentials.get_application_default()
@@ -33,50 +64,272 @@ class GoogleApiClient(object):
         return self
 
     def auth(self):
+        if self.credentials is not None:
+            return self
         if self.service_account is not None:
-            return self.auth_using_service_account(self.service_account, self.private_key, self.scope)
+            scope = tuple(self.scope) if type(self.scope) is ListType else self.scope
+            key = ('service_account', self.service_account, self.private_key, scope)
+            authenticate = lambda: self.auth_using_service_account(self.service_account, self.private_key, self.scope)
+        else:
+            key = ('gcloud',)
+            authenticate = self.auth_using_gcloud
+        if self.shared:
+            self.credentials = registry.get(key, lambda: authenticate().credentials)
+            return self
+        return authenticate()
+
+    def discover(self, api_name, api_version, credentials, http):
+        discovery_uri = 'https://www.googleapis.com/discovery/v1/apis/%s/%s/rest' % (api_name, api_version)
+        if self.discovery_cache is not None:
+            rest_description = self.discovery_cache.get(discovery_uri)
         else:
-            return self.auth_using_gcloud()
+            (resp_headers, content) = httplib2.Http().request(discovery_uri)
+            rest_description = json.loads(content)
+        http = http or ThreadLocalHttp(timeout=self.http_timeout)
+        service = discovery.build_from_document(rest_description, http=http, credentials=credentials)
+        # build_from_document may replace the credentials with a scoped copy
+        authorized_credentials = getattr(http.request, 'credentials', None)
+        resource_paths = set()
+        methods = self.index(rest_description, service, resource_paths)
+        return (discovery_uri, rest_description, service, authorized_credentials, resource_paths, methods)
 
     def build(self, api_name, api_version, **options):
-        self.discovery_uri = 'https://www.googleapis.com/discovery/v1/apis/%s/%s/rest' % (api_name, api_version)
-        (resp_headers, content) = httplib2.Http().request(self.discovery_uri)
-        self.rest_description = json.loads(content)
         credentials = options.get('credentials', self.credentials)
-        self.service = discovery.build(api_name, api_version, credentials=credentials)
+        http = options.get('http', self.http)
+        factory = lambda: self.discover(api_name, api_version, credentials, http)
+        if self.shared:
+            # the key holds the credentials and the http object, so their identities cannot be reused
+            key = ('service', api_name, api_version, credentials, http, self.http_timeout)
+            built = registry.get(key, factory)
+        else:
+            built = factory()
+        (self.discovery_uri, self.rest_description, self.service,
+            self.authorized_credentials, self.resource_paths, methods) = built
+        # methods is assigned last because warmup() uses it to tell that the build has finished
+        self.methods = methods
         return self
 
-    def request(self, resource, method, **kwargs):
+    def warmup(self):
+        if self.methods is None:
+            with self.build_lock:
+                if self.methods is None:
+                    self.auth().build(self.API_NAME, self.API_VERSION)
+        credentials = self.authorized_credentials
+        if credentials is not None and not credentials.access_token:
+            credentials.refresh(httplib2.Http())
+        return self
+
+    def index(self, rest_description, service, resource_paths, path=()):
+        methods = {}
+        for r, resource_description in rest_description.get('resources', {}).items():
+            resource = getattr(service, discovery.fix_method_name(r))()
+            resource_path = path + (r,)
+            resource_paths.add(resource_path)
+            for m, method_description in resource_description.get('methods', {}).items():
+                parameters = set(method_description.get('parameters', {}))
+                parameters.update(['body', 'media_body'])
+                methods[(resource_path, m)] = (
+                    getattr(resource, discovery.fix_method_name(m)),
+                    frozenset(parameters)
+                )
+            methods.update(self.index(resource_description, resource, resource_paths, resource_path))
+        return methods
+
+    def prepare(self, resource, method, **kwargs):
+        if self.methods is None:
+            self.warmup()
+
         if type(resource) is not ListType:
-            resources = [resource]
+            resources = (resource,)
         else:
-            resources = resource
-
-        rest_description = self.rest_description['resources']
-        service = self.service
-        for i,r in enumerate(resources):
-            if i != 0:
-                rest_description = rest_description['resources']
-            if not r in rest_description:
-                raise ResourceNameError(r)
-            rest_description = rest_description[r]
-            service = getattr(service, r)()
-
-        if not method in rest_description['methods']:
+            resources = tuple(resource)
+
+        try:
+            (function, parameters) = self.methods[(resources, method)]
+        except KeyError:
+            for i in range(len(resources)):
+                if resources[:i + 1] not in self.resource_paths:
+                    raise ResourceNameError(resources[i])
             raise MethodNameError(method)
 
-        rest_description = rest_description['methods'][method]
+        return function(**{k: v for k, v in kwargs.items() if k in parameters})
+
+    def add_hook(self, before=None, after=None):
+        if before is not None:
+            self.before_hooks.append(before)
+        if after is not None:
+            self.after_hooks.append(after)
+        return self
+
+    def map_error(self, resource, method, error):
+        return error
+
+    def check_response(self, resource, method, kwargs, res):
+        return res
+
+    def request(self, resource, method, **kwargs):
+        http_request = self.prepare(resource, method, **kwargs)
+        registry.refresh_ahead(self.authorized_credentials)
+
+        call = self.start_call(resource, method, http_request)
+        retry = self.retry
+        if retry is not None and not retry.is_idempotent(call['method_id'], http_request.method, kwargs):
+            retry = None
+
+        started = time.time()
+        try:
+            while True:
+                try:
+                    res = http_request.execute()
+                    break
+                except (HttpError, socket.error, httplib2.HttpLib2Error) as e:
+                    if isinstance(e, HttpError):
+                        call['status'] = e.resp.status
+                        call['response_bytes'] = len(e.content or '')
+                    delay = retry.delay(call['retries'], e, started) if retry is not None else None
+                    if delay is None:
+                        call['error'] = e
+                        if isinstance(e, HttpError):
+                            error = self.map_error(resource, method, e)
+                            # tells the caller whether an earlier attempt may have reached the server
+                            error.retries = call['retries']
+                            raise error
+                        raise
+                    time.sleep(delay)
+                    call['retries'] += 1
+        finally:
+            self.finish_call(call, started)
+
+        return self.check_response(resource, method, kwargs, res)
+
+    def start_call(self, resource, method, http_request):
+        call = {
+            'method_id': '.'.join((resource if type(resource) is ListType else [resource]) + [method]),
+            'resource': resource,
+            'method': method,
+            'request_bytes': http_request.body_size,
+            'response_bytes': None,
+            'status': None,
+            'retries': 0,
+            'latency': None,
+            'error': None,
+        }
+        postproc = http_request.postproc
+        def measure(resp, content):
+            call['status'] = resp.status
+            call['response_bytes'] = len(content)
+            return postproc(resp, content)
+        http_request.postproc = measure
+        for hook in self.before_hooks:
+            hook(call)
+        return call
+
+    def finish_call(self, call, started):
+        call['latency'] = time.time() - started
+        for hook in self.after_hooks:
+            hook(call)
+
+    def upload(self, resource, method, kwargs, **options):
+        http_request = self.prepare(resource, method, **kwargs)
+        if http_request.resumable is None:
+            return self.request(resource, method, **kwargs)
+        registry.refresh_ahead(self.authorized_credentials)
+
+        session_file = options.get('session_file')
+        restored = False
+        if session_file is not None and os.path.exists(session_file):
+            with open(session_file) as f:
+                http_request.resumable_uri = f.read().strip()
+            restored = True
+        progress = options.get('progress')
+
+        call = self.start_call(resource, method, http_request)
+        started = time.time()
+        (failures, chunk_started) = (0, started)
+        saved_uri = http_request.resumable_uri
+        reported = 0
+        # the server is asked how many bytes it has before resuming a restored or failed upload
+        query = restored
+        res = None
+        try:
+            while res is None:
+                try:
+                    if query:
+                        res = self.query_upload(http_request)
+                        query = False
+                    elif self.upload_finished(http_request):
+                        # googleapiclient would send an empty chunk with an invalid range here
+                        res = self.query_upload(http_request, http_request.resumable_progress)
+                    else:
+                        (status, res) = http_request.next_chunk()
+                except (HttpError, socket.error, httplib2.HttpLib2Error) as e:
+                    # next_chunk() would query the state itself, but googleapiclient fails on a 308 without Range
+                    http_request._in_error_state = False
+                    if isinstance(e, HttpError):
+                        call['status'] = e.resp.status
+                        if restored and e.resp.status in (404, 410):
+                            # the saved session has expired, so the upload starts over
+                            (http_request.resumable_uri, http_request.resumable_progress) = (None, 0)
+                            (restored, query) = (False, False)
+                            continue
+                    # retries and the deadline are counted per chunk, so long uploads keep retrying
+                    delay = self.retry.delay(failures, e, chunk_started) if self.retry is not None else None
+                    if delay is None:
+                        call['error'] = e
+                        if isinstance(e, HttpError):
+                            error = self.map_error(resource, method, e)
+                            # tells the caller whether an earlier attempt may have reached the server
+                            error.retries = call['retries']
+                            raise error
+                        raise
+                    time.sleep(delay)
+                    call['retries'] += 1
+                    failures += 1
+                    query = http_request.resumable_uri is not None
+                    continue
+                (failures, chunk_started) = (0, time.time())
+                if session_file is not None and http_request.resumable_uri != saved_uri:
+                    self.save_session(session_file, http_request.resumable_uri)
+                    saved_uri = http_request.resumable_uri
+                size = http_request.resumable.size()
+                uploaded = size if res is not None and size is not None else http_request.resumable_progress
+                if progress is not None and uploaded > reported:
+                    progress(uploaded, size)
+                    reported = uploaded
+        finally:
+            self.finish_call(call, started)
+
+        if session_file is not None and os.path.exists(session_file):
+            os.remove(session_file)
+        return self.check_response(resource, method, kwargs, res)
+
+    def upload_finished(self, http_request):
+        # a stream of unknown size may end exactly on a chunk boundary
+        return http_request.resumable.size() is None and http_request.resumable_uri is not None \
+            and http_request.resumable_progress > 0 \
+            and not http_request.resumable.getbytes(http_request.resumable_progress, 1)
 
-        parameters = {}
-        for parameter in rest_description['parameters']:
-            if parameter in kwargs:
-                parameters[parameter] = kwargs[parameter]
-            #elif 'required' in rest_description['parameters'][parameter]:
-            #    raise RequiredParameterIsMissingError(parameter)
+    def query_upload(self, http_request, size=None):
+        if size is None:
+            size = http_request.resumable.size()
+        headers = {
+            'Content-Range': 'bytes */%s' % ('*' if size is None else size),
+            'content-length': '0',
+        }
+        (resp, content) = http_request.http.request(http_request.resumable_uri, method='PUT', headers=headers)
+        if resp.status in (200, 201):
+            return http_request.postproc(resp, content)
+        elif resp.status == 308:
+            # no Range header means that no bytes have been received yet
+            http_request.resumable_progress = int(resp['range'].split('-')[1]) + 1 if 'range' in resp else 0
+            return None
+        raise HttpError(resp, content, uri=http_request.resumable_uri)
 
-        if 'body' in kwargs:
-            parameters['body'] = kwargs['body']
-        if 'media_body' in kwargs:
-            parameters['media_body'] = kwargs['media_body']
+    def save_session(self, session_file, resumable_uri):
+        (fd, path) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(session_file)))
+        with os.fdopen(fd, 'w') as f:
+            f.write(resumable_uri)
+        os.rename(path, session_file)
 
-        return getattr(service, method)(**parameters).execute()
+    def batch(self, **options):
+        return Batch(self.warmup(), **options)
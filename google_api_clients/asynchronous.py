@@ -0,0 +1,31 @@
+from multiprocessing.pool import ThreadPool
+
+class AsyncClient(object):
+
+    MAX_WORKERS = 16
+
+    def __init__(self, client, **options):
+        self.client = client
+        self.pool = ThreadPool(options.get('max_workers', AsyncClient.MAX_WORKERS))
+
+    def submit(self, function, *args, **kwargs):
+        return self.pool.apply_async(function, args, kwargs)
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if not callable(attr):
+            return attr
+        def method(*args, **kwargs):
+            return self.submit(attr, *args, **kwargs)
+        return method
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -0,0 +1,88 @@
+import time
+
+from googleapiclient.http import BatchHttpRequest
+from urlparse import urljoin
+
+from .errors import BatchError
+
+class BatchResult(object):
+
+    def __init__(self):
+        self.finished = False
+        self.value = None
+        self.error = None
+
+    def done(self):
+        return self.finished
+
+    def result(self):
+        if not self.finished:
+            raise BatchError('batch has not been executed')
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+class Batch(object):
+
+    MAX_BATCH_SIZE = 1000
+
+    def __init__(self, client, **options):
+        self.client = client
+        self.batch_size = min(options.get('batch_size', Batch.MAX_BATCH_SIZE), Batch.MAX_BATCH_SIZE)
+        self.queue = []
+
+    def batch_uri(self):
+        rest_description = self.client.rest_description
+        if 'batchPath' in rest_description:
+            return urljoin(rest_description['rootUrl'], rest_description['batchPath'])
+        return 'https://www.googleapis.com/batch'
+
+    def request(self, resource, method, **kwargs):
+        result = BatchResult()
+        http_request = self.client.prepare(resource, method, **kwargs)
+        self.queue.append((resource, method, kwargs, http_request, result))
+        return result
+
+    def execute(self):
+        (queue, self.queue) = (self.queue, [])
+        for i in range(0, len(queue), self.batch_size):
+            self.send(queue[i:i + self.batch_size])
+        return [x[-1] for x in queue]
+
+    def send(self, queue):
+        # every request is measured like a single one, so the hooks and stats see the batched calls too
+        calls = [self.client.start_call(resource, method, http_request)
+            for (resource, method, kwargs, http_request, result) in queue]
+        def callback(request_id, res, exception):
+            (resource, method, kwargs, http_request, result) = queue[int(request_id)]
+            if exception is not None:
+                (calls[int(request_id)]['status'], calls[int(request_id)]['error']) = (exception.resp.status, exception)
+                result.error = self.client.map_error(resource, method, exception)
+            else:
+                try:
+                    result.value = self.client.check_response(resource, method, kwargs, res)
+                except Exception as e:
+                    result.error = e
+            result.finished = True
+
+        batch = BatchHttpRequest(batch_uri=self.batch_uri())
+        for (i, (resource, method, kwargs, http_request, result)) in enumerate(queue):
+            batch.add(http_request, callback=callback, request_id=str(i))
+        started = time.time()
+        try:
+            batch.execute()
+        except Exception as e:
+            for call in calls:
+                call['error'] = e
+            raise
+        finally:
+            for call in calls:
+                self.client.finish_call(call, started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.execute()
+        return False
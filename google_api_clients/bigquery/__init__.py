@@ -1,9 +1,18 @@
+import glob
+import httplib2
+import itertools
 import json
 import os
 import re
-import signal
+import socket
+import threading
 import time
+import uuid
 
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+from Queue import Full
+from Queue import Queue
 from StringIO import StringIO
 from types import DictionaryType
 from types import ListType
@@ -14,6 +23,10 @@ from googleapiclient.http import MediaFileUpload
 from googleapiclient.http import MediaIoBaseUpload
 
 from .. import GoogleApiClient
+from ..asynchronous import AsyncClient
+from ..retry import RetryPolicy
+from .decoder import ColumnBuilder
+from .decoder import decoders
 from .errors import AlreadyExistsError
 from .errors import BigQueryError
 from .errors import DatasetIsNotEmptyError
@@ -23,53 +36,57 @@ from .errors import JobWaitTimeoutError
 from .errors import LoadError
 from .errors import NotFoundError
 from .errors import ParameterError
+from .inserter import Inserter
+from .scheduler import Scheduler
+from .upload import FileStreamUpload
+from .upload import RowStreamUpload
+from .upload import StreamUpload
 
 class BigQuery(GoogleApiClient):
 
+    API_NAME = 'bigquery'
+    API_VERSION = 'v2'
     JOB_WAIT_TIMEOUT = 600
+    JOB_POLL_INTERVAL = 0.25
+    JOB_MAX_POLL_INTERVAL = 8
+    JOB_LONG_POLL_TIMEOUT = 10
     MAX_RESULTS = 100000
+    PREFETCH = 2
+    INSERT_MAX_ROWS = 500
+    INSERT_MAX_BYTES = 5 * 1024 * 1024
+    INSERT_WORKERS = 4
+    LOAD_WORKERS = 4
+    RETRYABLE_INSERT_REASONS = ('backendError', 'internalError', 'stopped', 'timeout')
 
     def __init__(self, project_id, **options):
         super(BigQuery, self).__init__(project_id=project_id, **options)
-        self.auth().build('bigquery', 'v2')
         self.dataset_id = options.get('dataset_id')
 
-    def request(self, resource, method, **kwargs):
-        try:
-            res = super(BigQuery, self).request(resource, method, **kwargs)
-            if 'insertErrors' in res:
-                # tabledata.insertAll
-                for error in [y for x in res['insertErrors'] for y in x['errors']]:
-                    if 'message' in error:
-                        if re.search(r'no such field', error['message'], re.I):
-                            raise BigQueryError(error)
-                        elif kwargs['body']['skipInvalidRows'] is not True:
-                            raise BigQueryError(error)
-                    else:
-                        BigQueryError(error)
-            elif 'errors' in res:
-                # jobs.query
-                raise BigQueryError(res['errors'])
-            elif 'status' in res and 'errors' in res['status']:
-                # jobs.insert
-                raise BigQueryError(res['status']['errors'])
-        except HttpError as e:
-            if e.resp.status == 409 and re.search(r'Already Exists', str(e), re.I):
-                raise AlreadyExistsError(e)
-            elif e.resp.status == 404 and re.search(r'Not Found', str(e), re.I):
-                raise NotFoundError(e)
-            elif e.resp.status == 400 and re.search(r'Required parameter is missing', str(e), re.I):
-                raise ParameterError(e)
-            elif e.resp.status == 400 and re.search(r'still in use', str(e), re.I) \
-                and resource == 'datasets' and method == 'delete':
-                raise DatasetIsNotEmptyError(e)
-            elif 400 <= e.resp.status <= 499:
-                raise Http4xxError(e)
-            elif 500 <= e.resp.status <= 599:
-                raise Http5xxError(e)
-            else:
-                raise e
-
+    def map_error(self, resource, method, error):
+        if error.resp.status == 409 and re.search(r'Already Exists', str(error), re.I):
+            return AlreadyExistsError(error)
+        elif error.resp.status == 404 and re.search(r'Not Found', str(error), re.I):
+            return NotFoundError(error)
+        elif error.resp.status == 400 and re.search(r'Required parameter is missing', str(error), re.I):
+            return ParameterError(error)
+        elif error.resp.status == 400 and re.search(r'still in use', str(error), re.I) \
+            and resource == 'datasets' and method == 'delete':
+            return DatasetIsNotEmptyError(error)
+        elif 400 <= error.resp.status <= 499:
+            return Http4xxError(error)
+        elif 500 <= error.resp.status <= 599:
+            return Http5xxError(error)
+        else:
+            return error
+
+    def check_response(self, resource, method, kwargs, res):
+        # insertErrors of tabledata.insertAll are handled per row by insert()
+        if 'errors' in res:
+            # jobs.query
+            raise BigQueryError(res['errors'])
+        elif 'status' in res and 'errors' in res['status']:
+            # jobs.insert
+            raise BigQueryError(res['status']['errors'])
         return res
 
     def create_dataset(self, dataset_id, **options):
@@ -207,37 +224,217 @@ class BigQuery(GoogleApiClient):
             ret.extend(self.show_tables(**options))
         return ret
 
+    def chunk_rows(self, rows, **options):
+        insert_id = options.get('insert_id', lambda row: uuid.uuid4().hex)
+        entries = []
+        for (index, row) in enumerate(rows):
+            entry = { 'json': row }
+            if insert_id is not None:
+                entry['insertId'] = insert_id(row)
+            entries.append((index, entry))
+        return self.chunk_entries(entries, **options)
+
+    def chunk_entries(self, entries, **options):
+        max_rows = options.get('max_rows', BigQuery.INSERT_MAX_ROWS)
+        max_bytes = options.get('max_bytes', BigQuery.INSERT_MAX_BYTES)
+        chunks = []
+        (chunk, size) = ([], 0)
+        for (index, entry) in entries:
+            # the separator between rows is counted as well
+            entry_size = len(json.dumps(entry)) + 1
+            if chunk and (len(chunk) >= max_rows or size + entry_size > max_bytes):
+                chunks.append(chunk)
+                (chunk, size) = ([], 0)
+            chunk.append((index, entry))
+            size += entry_size
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def is_retryable_insert_error(self, errors):
+        return all([error.get('reason') in BigQuery.RETRYABLE_INSERT_REASONS for error in errors])
+
     def insert(self, table_id, rows, **options):
         kwargs = {
             'projectId': options.get('project_id', self.project_id),
             'datasetId': options.get('dataset_id', self.dataset_id),
             'tableId': table_id,
-            'body': {
-                'rows': [ { 'json': row } for row in rows ],
+        }
+        def insert_chunk(chunk):
+            body = {
+                'rows': [entry for (index, entry) in chunk],
                 'ignoreUnknownValues': options.get('ignore_unknown_values', False),
                 'skipInvalidRows': options.get('skip_invalid_rows', False),
             }
+            try:
+                return self.request('tabledata', 'insertAll', body=body, **kwargs)
+            except Exception as e:
+                return e
+
+        ret = {
+            'kind': 'bigquery#tableDataInsertAllResponse',
+            'chunks': [],
+            'inserted': 0,
+            'retried': 0,
         }
-        return self.request('tabledata', 'insertAll', **kwargs)
+        insert_errors = {}
+        chunk_errors = []
+        chunks = self.chunk_rows(rows, **options)
+        attempt = 0
+        while chunks:
+            if len(chunks) > 1:
+                pool = ThreadPool(min(options.get('workers', BigQuery.INSERT_WORKERS), len(chunks)))
+                try:
+                    results = pool.map(insert_chunk, chunks)
+                finally:
+                    pool.terminate()
+            else:
+                results = [insert_chunk(chunk) for chunk in chunks]
+
+            retry_entries = []
+            for (chunk, res) in zip(chunks, results):
+                if isinstance(res, Exception):
+                    # the request has been retried already, so every row of the chunk fails with it
+                    ret['chunks'].append({ 'attempt': attempt, 'rows': len(chunk), 'response': None, 'error': res })
+                    chunk_errors.append(res)
+                    cause = res.args[0] if res.args and isinstance(res.args[0], HttpError) else None
+                    error = { 'reason': RetryPolicy.reason(cause) if cause is not None else None, 'message': str(res) }
+                    for (index, entry) in chunk:
+                        insert_errors[index] = [error]
+                    continue
+                ret['chunks'].append({ 'attempt': attempt, 'rows': len(chunk), 'response': res, 'error': None })
+                errors = dict([(error['index'], error['errors']) for error in res.get('insertErrors', [])])
+                for (i, (index, entry)) in enumerate(chunk):
+                    if i not in errors:
+                        ret['inserted'] += 1
+                        insert_errors.pop(index, None)
+                        continue
+                    insert_errors[index] = errors[i]
+                    # rows stopped because of another invalid row are resent on their own
+                    if self.is_retryable_insert_error(errors[i]):
+                        retry_entries.append((index, entry))
+
+            if not retry_entries or attempt >= options.get('max_row_retries', 0):
+                break
+            # the rows are retried even when the client does not retry requests
+            time.sleep((self.retry or RetryPolicy()).backoff(attempt))
+            attempt += 1
+            ret['retried'] += len(retry_entries)
+            chunks = self.chunk_entries(retry_entries, **options)
+
+        if insert_errors:
+            ret['insertErrors'] = [{ 'index': index, 'errors': insert_errors[index] } for index in sorted(insert_errors)]
+            # every chunk has been sent before the first failure is raised
+            if chunk_errors and options.get('raise_errors', True):
+                raise chunk_errors[0]
+            if options.get('raise_errors', True):
+                messages = [error.get('message', '') for x in ret['insertErrors'] for error in x['errors']]
+                if options.get('skip_invalid_rows', False) is not True \
+                    or any([re.search(r'no such field', message, re.I) for message in messages]):
+                    raise BigQueryError(ret['insertErrors'])
+        return ret
 
-    def dump_table(self, table_id, **options):
+    def inserter(self, table_id, **options):
+        return Inserter(self, table_id, **options)
+
+    def iter_table(self, table_id, **options):
+        if options.get('workers', 1) > 1:
+            for row in self.iter_table_shards(table_id, **options):
+                yield row
+            return
+
+        limit = options.get('limit')
         kwargs = {
             'projectId': options.get('project_id', self.project_id),
             'datasetId': options.get('dataset_id', self.dataset_id),
             'tableId': table_id,
-            'maxResults': options.get('max_results', BigQuery.MAX_RESULTS),
             'pageToken': options.get('page_token'),
             'startIndex': options.get('start_index'),
         }
-        res = self.request('tabledata', 'list', **kwargs)
-        if 'rows' not in res:
-            return []
-        ret = res['rows']
-        if 'pageToken' in res:
-            options['page_token'] = res['pageToken']
-            options['start_index'] = options.get('start_index', 0) + len(res['rows'])
-            ret.extend(self.dump_table(table_id, **options))
-        return ret
+        decoder = None
+        if options.get('typed') is True:
+            schema = options.get('schema')
+            if schema is None:
+                # tabledata.list does not return the schema
+                schema = self.request('tables', 'get', projectId=kwargs['projectId'],
+                    datasetId=kwargs['datasetId'], tableId=table_id)['schema']['fields']
+            decoder = decoders.get(schema)
+        count = 0
+        while limit is None or count < limit:
+            kwargs['maxResults'] = options.get('max_results', BigQuery.MAX_RESULTS)
+            if limit is not None:
+                kwargs['maxResults'] = min(kwargs['maxResults'], limit - count)
+            res = self.request('tabledata', 'list', **kwargs)
+            rows = res.get('rows', [])
+            if decoder is not None:
+                rows = decoder(rows)
+            for row in rows:
+                yield row
+            count += len(res.get('rows', []))
+            if 'pageToken' not in res or not res.get('rows'):
+                return
+            # only one page is held in memory at a time
+            kwargs['pageToken'] = res['pageToken']
+            kwargs['startIndex'] = None
+
+    def iter_table_shards(self, table_id, **options):
+        kwargs = {
+            'projectId': options.get('project_id', self.project_id),
+            'datasetId': options.get('dataset_id', self.dataset_id),
+            'tableId': table_id,
+        }
+        start_index = int(options.get('start_index') or 0)
+        table = self.request('tables', 'get', **kwargs)
+        if 'numRows' not in table:
+            # without the row count the shards cannot be known, so the table is paged through
+            for row in self.iter_table(table_id, **dict(options, workers=1, schema=table.get('schema', {}).get('fields'))):
+                yield row
+            return
+        end_index = int(table['numRows'])
+        if options.get('limit') is not None:
+            end_index = min(end_index, start_index + options['limit'])
+        shard_size = options.get('shard_size', options.get('max_results', BigQuery.MAX_RESULTS))
+        shards = [(i, min(shard_size, end_index - i)) for i in range(start_index, end_index, shard_size)]
+
+        shard_options = dict([(k, v) for (k, v) in options.items()
+            if k not in ('workers', 'ordered', 'shard_size', 'start_index', 'limit', 'page_token')])
+        if options.get('typed') is True:
+            shard_options['schema'] = table['schema']['fields']
+        finished = Queue()
+        def read_shard(index):
+            try:
+                rows = list(self.iter_table(table_id, start_index=shards[index][0], limit=shards[index][1], **shard_options))
+                finished.put((index, rows, None))
+            except Exception as e:
+                finished.put((index, None, e))
+
+        # a shard is only started when one has been consumed, so at most workers shards are held in memory
+        workers = options['workers']
+        ordered = options.get('ordered', True)
+        pool = ThreadPool(workers)
+        try:
+            (submitted, consumed, results) = (0, 0, {})
+            while consumed < len(shards):
+                while submitted < len(shards) and submitted - consumed < workers:
+                    pool.apply_async(read_shard, (submitted,))
+                    submitted += 1
+                (index, rows, error) = finished.get()
+                if error is not None:
+                    raise error
+                results[index] = rows
+                while results:
+                    index = consumed if ordered else next(iter(results))
+                    if index not in results:
+                        break
+                    rows = results.pop(index)
+                    consumed += 1
+                    for row in rows:
+                        yield row
+        finally:
+            pool.terminate()
+
+    def dump_table(self, table_id, **options):
+        return list(self.iter_table(table_id, **options))
 
     def detect_file_format(self, filename):
         file_format = None
@@ -277,42 +474,294 @@ class BigQuery(GoogleApiClient):
 
     def wait_job(self, job_id, **options):
         timeout = options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT)
-        def handler(x, y):
-            raise JobWaitTimeoutError('timeout: ' + str(timeout) + 'sec')
-        signal.signal(signal.SIGALRM, handler)
-        signal.alarm(timeout)
+        deadline = time.time() + timeout
+        interval = options.get('poll_interval', BigQuery.JOB_POLL_INTERVAL)
+        project_id = options.get('project_id', self.project_id)
         while True:
-            res = self.info_job(job_id)
-            if res['status']['state'] == 'DONE':
-                signal.alarm(0)
-                return res
-            time.sleep(2)
+            if options.get('long_poll') is True:
+                # getQueryResults holds the request open until the query completes or timeoutMs passes
+                kwargs = {
+                    'projectId': project_id,
+                    'jobId': job_id,
+                    'maxResults': 0,
+                    'timeoutMs': int(max(min(deadline - time.time(), BigQuery.JOB_LONG_POLL_TIMEOUT), 0) * 1000),
+                }
+                if self.request('jobs', 'getQueryResults', **kwargs)['jobComplete'] is True:
+                    return self.info_job(job_id, project_id=project_id)
+            else:
+                res = self.info_job(job_id, project_id=project_id)
+                if res['status']['state'] == 'DONE':
+                    return res
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                raise JobWaitTimeoutError('timeout: ' + str(timeout) + 'sec')
+            if options.get('long_poll') is not True:
+                # short jobs are noticed quickly and long ones are not polled too often
+                time.sleep(min(interval, remaining))
+                interval = min(interval * 2, options.get('max_poll_interval', BigQuery.JOB_MAX_POLL_INTERVAL))
+
+    def wait_jobs(self, job_ids, **options):
+        timeout = options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT)
+        started = time.time()
+        deadlines = OrderedDict()
+        for job_id in job_ids:
+            job_timeout = timeout.get(job_id, BigQuery.JOB_WAIT_TIMEOUT) if type(timeout) is DictionaryType else timeout
+            deadlines[job_id] = (started + job_timeout, job_timeout)
+        interval = options.get('poll_interval', BigQuery.JOB_POLL_INTERVAL)
+        project_id = options.get('project_id', self.project_id)
+        while deadlines:
+            polled = self.poll_jobs(list(deadlines), project_id=project_id)
+            now = time.time()
+            for (job_id, result) in polled:
+                (deadline, job_timeout) = deadlines[job_id]
+                if result.error is not None:
+                    # a rate-limited or failed poll says nothing about the job, so it is polled again
+                    running = self.is_retryable_poll_error(result.error)
+                else:
+                    running = result.value['status']['state'] != 'DONE'
+                if running:
+                    if now < deadline:
+                        continue
+                    result.error = JobWaitTimeoutError('timeout: ' + str(job_timeout) + 'sec')
+                del deadlines[job_id]
+                yield (job_id, result)
+            if deadlines:
+                next_deadline = min([deadline for (deadline, job_timeout) in deadlines.values()])
+                time.sleep(max(min(interval, next_deadline - time.time()), 0))
+                interval = min(interval * 2, options.get('max_poll_interval', BigQuery.JOB_MAX_POLL_INTERVAL))
+
+    def poll_jobs(self, job_ids, **options):
+        # one batch request polls every job
+        project_id = options.get('project_id', self.project_id)
+        batch = self.batch()
+        polled = [(job_id, batch.request('jobs', 'get', projectId=project_id, jobId=job_id)) for job_id in job_ids]
+        try:
+            batch.execute()
+        except (HttpError, socket.error, httplib2.HttpLib2Error) as e:
+            if not self.is_retryable_poll_error(e):
+                raise
+            # the whole batch failed, so every job gets the error and is polled again
+            for (job_id, result) in polled:
+                if not result.finished:
+                    (result.error, result.finished) = (e, True)
+        return polled
+
+    def is_retryable_poll_error(self, error):
+        if isinstance(error, (Http4xxError, Http5xxError)) and error.args:
+            error = error.args[0]
+        return (self.retry or RetryPolicy()).is_retryable_error(error)
+
+    def scheduler(self, **options):
+        return Scheduler(self, **options)
+
+    def insert_job(self, kwargs, **options):
+        if 'job_id' in options:
+            kwargs['body']['jobReference'] = {
+                'projectId': self.project_id,
+                'jobId': options['job_id'],
+            }
+
+        try:
+            media_body = kwargs.get('media_body')
+            if media_body is not None and media_body.resumable():
+                res = self.upload('jobs', 'insert', kwargs,
+                    session_file=options.get('session_file'), progress=options.get('progress'))
+            else:
+                res = self.request('jobs', 'insert', **kwargs)
+        except AlreadyExistsError as e:
+            if 'job_id' not in options or not getattr(e, 'retries', 0):
+                raise
+            # a retried attempt whose first response was lost has already created the job
+            res = self.info_job(options['job_id'])
+
+        job_id = res['jobReference']['jobId']
+        if options.get('async') is True:
+            return job_id
+        else:
+            return self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT))
+
+    def local_files(self, data, **options):
+        if type(data) is StringType and not re.search(r'^gs://', data):
+            if os.path.exists(data):
+                return [data]
+            elif options.get('glob') is True:
+                filenames = sorted(glob.glob(data))
+                if not filenames:
+                    raise LoadError('No files match: ' + data)
+                return filenames
+            elif re.search(r'[*?[]', data) and '\n' not in data and not self.is_json(data):
+                # inline data may contain these characters too, so a pattern without matches is loaded as data
+                return sorted(glob.glob(data)) or None
+        elif type(data) is ListType and data and all([type(x) is StringType for x in data]) \
+            and any([os.path.isfile(x) for x in data]):
+            # a list with any local file is a file list, so a missing one is not loaded as a row
+            missing = [x for x in data if not os.path.isfile(x)]
+            if missing:
+                raise LoadError('No such file: ' + missing[0])
+            return data
+        return None
+
+    def is_json(self, data):
+        try:
+            json.loads(data)
+            return True
+        except ValueError:
+            return False
+
+    def shard_file(self, filename, shard_size):
+        shards = []
+        with open(filename, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            start = 0
+            while start < size:
+                # every shard ends at the end of a line
+                f.seek(min(start + shard_size, size) - 1)
+                f.readline()
+                end = f.tell()
+                shards.append((start, end))
+                start = end
+        return shards
+
+    def read_lines(self, filename, start, end):
+        with open(filename, 'rb') as f:
+            f.seek(start)
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                yield line.rstrip('\r\n')
+
+    def load_files(self, table_id, filenames, **options):
+        parts = []
+        for filename in filenames:
+            (source_format, field_delimiter, compression) = self.detect_file_format(filename)
+            shard_size = options.get('shard_size')
+            if shard_size and compression == 'NONE' and source_format in ('CSV', 'NEWLINE_DELIMITED_JSON') \
+                and options.get('allow_quoted_newlines') is not True and os.path.getsize(filename) > shard_size:
+                for (i, (start, end)) in enumerate(self.shard_file(filename, shard_size)):
+                    part_options = {
+                        'source_format': options.get('source_format', source_format),
+                        'field_delimiter': options.get('field_delimiter', field_delimiter),
+                    }
+                    if i > 0:
+                        # the header rows are only in the first shard
+                        part_options['skip_leading_rows'] = None
+                    parts.append((self.read_lines(filename, start, end), part_options))
+            else:
+                parts.append((filename, {}))
+
+        base_options = dict([(k, v) for (k, v) in options.items()
+            if k not in ('workers', 'shard_size', 'session_file', 'progress', 'job_id', 'raise_errors')])
+        def load_part(part):
+            (index, (data, part_options)) = part
+            part_options = dict(base_options, **part_options)
+            if 'job_id' in options:
+                part_options['job_id'] = '%s_%d' % (options['job_id'], index)
+            try:
+                return self.load(table_id, data, **part_options)
+            except Exception as e:
+                return e
+
+        parts = list(enumerate(parts))
+        results = []
+        if options.get('write_disposition') in ('WRITE_TRUNCATE', 'WRITE_EMPTY') and len(parts) > 1:
+            # the first part empties or checks the table before the others append to it
+            (index, (data, part_options)) = parts.pop(0)
+            part_options = dict(part_options)
+            part_options['async'] = False
+            results.append(load_part((index, (data, part_options))))
+            base_options['write_disposition'] = 'WRITE_APPEND'
+            if isinstance(results[0], Exception) or 'errorResult' in results[0].get('status', {}):
+                # the other parts would be appended to a table that was not emptied or checked
+                results.extend([LoadError('Not loaded because the first part failed') for part in parts])
+                parts = []
+        if parts:
+            # the workers only upload and start the jobs, so a worker is never held by a running job
+            base_options['async'] = True
+            pool = ThreadPool(min(options.get('workers', BigQuery.LOAD_WORKERS), len(parts)))
+            try:
+                job_ids = pool.map(load_part, parts)
+            finally:
+                pool.terminate()
+            if options.get('async') is True:
+                results.extend(job_ids)
+            else:
+                jobs = dict(self.wait_jobs([x for x in job_ids if not isinstance(x, Exception)],
+                    timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT)))
+                for job_id in job_ids:
+                    if isinstance(job_id, Exception):
+                        results.append(job_id)
+                    elif jobs[job_id].error is not None:
+                        results.append(jobs[job_id].error)
+                    else:
+                        results.append(jobs[job_id].value)
+
+        ret = {
+            'jobs': [],
+            'errors': [],
+            'status': { 'state': 'RUNNING' if options.get('async') is True else 'DONE' },
+        }
+        for (index, res) in enumerate(results):
+            if isinstance(res, Exception):
+                ret['jobs'].append(None)
+                ret['errors'].append({ 'index': index, 'error': res })
+                continue
+            ret['jobs'].append(res)
+            if type(res) is DictionaryType and 'errorResult' in res.get('status', {}):
+                ret['errors'].append({ 'index': index, 'error': BigQueryError(res['status']['errorResult']) })
+        if ret['errors'] and options.get('raise_errors', True):
+            raise ret['errors'][0]['error']
+        return ret
+
+    def upload_options(self, options):
+        # BigQuery detects gzip compressed media itself, so the load configuration needs no change
+        return {
+            'chunk_size': options.get('chunk_size', StreamUpload.CHUNK_SIZE),
+            'compress': options.get('gzip', False),
+            'compress_level': options.get('gzip_level', StreamUpload.COMPRESS_LEVEL),
+        }
 
     def load(self, table_id, data, **options):
+        filenames = self.local_files(data, **options)
+        if filenames is not None and (len(filenames) > 1 or options.get('shard_size')):
+            return self.load_files(table_id, filenames, **options)
+        elif filenames is not None:
+            data = filenames[0]
+
         media_body = None
         source_uris = None
         source_format = None
         field_delimiter = None
 
-        if type(data) is ListType:
-            if type(data[0]) is DictionaryType:
-                newline_delimited_json = '\n'.join([json.dumps(datum) for datum in data])
-                media_body = MediaIoBaseUpload(StringIO(newline_delimited_json), mimetype='application/octet-stream')
+        if type(data) is ListType and data and type(data[0]) is StringType and re.search(r'^gs://', data[0]):
+            source_uris = data
+            (source_format, field_delimiter, compression) = self.detect_file_format(data[0])
+        elif type(data) is ListType or type(data) is not StringType and not isinstance(data, dict) and hasattr(data, '__iter__'):
+            # rows are serialized while they are uploaded, so the whole document is never held in memory
+            rows = iter(data)
+            try:
+                first = next(rows)
+            except StopIteration:
+                raise LoadError('No data to load')
+            if isinstance(first, dict):
                 source_format = 'NEWLINE_DELIMITED_JSON'
-            elif type(data[0]) is StringType and re.search(r'^gs://', data[0]):
-                source_uris = data
-                (source_format, field_delimiter, compression) = self.detect_file_format(data[0])
-            elif type(data[0]) is StringType:
-                media_body = MediaIoBaseUpload(StringIO('\n'.join(data)), mimetype='application/octet-stream')
+            elif isinstance(first, basestring):
                 source_format = 'CSV'
             else:
                 raise LoadError('Unknown data type')
+            media_body = RowStreamUpload(itertools.chain([first], rows), **self.upload_options(options))
         elif type(data) is StringType and re.search(r'^gs://', data):
             source_uris = [data]
             (source_format, field_delimiter, compression) = self.detect_file_format(data)
         elif type(data) is StringType and os.path.exists(data):
-            media_body = MediaFileUpload(data, mimetype='application/octet-stream')
             (source_format, field_delimiter, compression) = self.detect_file_format(data)
+            if options.get('gzip') is True and compression == 'NONE' and source_format != 'AVRO':
+                media_body = FileStreamUpload(data, **self.upload_options(options))
+            else:
+                media_body = MediaFileUpload(data, mimetype='application/octet-stream',
+                    chunksize=options.get('chunk_size', StreamUpload.CHUNK_SIZE), resumable=True)
+        elif type(data) is StringType and options.get('gzip') is True:
+            media_body = StreamUpload([data], **self.upload_options(options))
         elif type(data) is StringType:
             media_body = MediaIoBaseUpload(StringIO(data), mimetype='application/octet-stream')
         else:
@@ -354,13 +803,7 @@ class BigQuery(GoogleApiClient):
             'media_body': media_body
         }
 
-        res = self.request('jobs', 'insert', **kwargs)
-
-        job_id = res['jobReference']['jobId']
-        if options.get('async') is True:
-            return job_id
-        else:
-            return self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT))
+        return self.insert_job(kwargs, **options)
 
     def insert_from_select(self, dest_table_id, query, **options):
         configuration = {
@@ -372,7 +815,7 @@ class BigQuery(GoogleApiClient):
                 'tableId': dest_table_id,
             },
             'flattenResults': options.get('flatten_results', True),
-            'priority': options.get('priority', 'INTERACIVE'),
+            'priority': options.get('priority', 'INTERACTIVE'),
             'query': query,
             'tableDefinitions': options.get('table_definitions'),
             'useQueryCache': options.get('use_query_cache'),
@@ -395,13 +838,7 @@ class BigQuery(GoogleApiClient):
             }
         }
 
-        res = self.request('jobs', 'insert', **kwargs)
-
-        job_id = res['jobReference']['jobId']
-        if options.get('async') is True:
-            return job_id
-        else:
-            return self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT))
+        return self.insert_job(kwargs, **options)
 
     def extract(self, table_id, destination_uri, **options):
         destination_uris = []
@@ -434,15 +871,9 @@ class BigQuery(GoogleApiClient):
             }
         }
 
-        res = self.request('jobs', 'insert', **kwargs)
+        return self.insert_job(kwargs, **options)
 
-        job_id = res['jobReference']['jobId']
-        if options.get('async') is True:
-            return job_id
-        else:
-            return self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT))
-
-    def get_query_results(self, job_id, **options):
+    def iter_query_pages(self, job_id, **options):
         kwargs = {
             'projectId': self.project_id,
             'jobId': job_id,
@@ -451,26 +882,86 @@ class BigQuery(GoogleApiClient):
             'startIndex': options.get('start_index'),
             'timeoutMs': options.get('timeout_ms'),
         }
+        pages = Queue(maxsize=max(options.get('prefetch', BigQuery.PREFETCH), 1))
+        stop = threading.Event()
+
+        def put(item):
+            # give up when the caller has stopped reading, so the thread never blocks forever
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
 
-        res = self.request('jobs', 'getQueryResults', **kwargs)
+        def fetch():
+            try:
+                while not stop.is_set():
+                    res = self.request('jobs', 'getQueryResults', **kwargs)
+                    if res['jobComplete'] is False:
+                        self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT), long_poll=True)
+                        continue
+                    if 'pageToken' not in res or not res.get('rows'):
+                        put(('page', res))
+                        break
+                    if not put(('page', res)):
+                        return
+                    kwargs['pageToken'] = res['pageToken']
+                    kwargs['startIndex'] = None
+                put(('done', None))
+            except Exception as e:
+                put(('error', e))
+
+        thread = threading.Thread(target=fetch)
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                (kind, value) = pages.get()
+                if kind == 'done':
+                    return
+                elif kind == 'error':
+                    raise value
+                yield value
+        finally:
+            stop.set()
+
+    def iter_query_results(self, job_id, **options):
+        for res in self.iter_query_pages(job_id, **options):
+            if options.get('typed') is True:
+                rows = decoders.get(res['schema']['fields'])(res.get('rows', []))
+            else:
+                rows = [[column['v'] for column in row['f']] for row in res.get('rows', [])]
+            for row in rows:
+                yield row
+
+    def get_query_columns(self, job_id, **options):
+        builder = None
+        for res in self.iter_query_pages(job_id, **options):
+            if builder is None:
+                # totalRows is known from the first page, so every column is allocated once
+                builder = ColumnBuilder(res['schema']['fields'], int(res.get('totalRows', 0)))
+            builder.add(res.get('rows', []))
+        columns = builder.columns()
+        if options.get('output') == 'dataframe':
+            import pandas
+            return pandas.DataFrame(columns, columns=list(columns))
+        return columns
 
-        job_id = res['jobReference']['jobId']
+    def get_query_results(self, job_id, **options):
         if options.get('async') is True:
-            return job_id
-        elif res['jobComplete'] is False:
-            res = self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT))
-
-        if 'rows' not in res:
-            return []
-        else:
-            ret = []
-            for row in res['rows']:
-                ret.append([column['v'] for column in row['f']])
-            if 'pageToken' in res:
-                options['page_token'] = res['pageToken']
-                options['start_index'] = options.get('start_index', 0) + len(res['rows'])
-                ret.extend(self.get_query_results(job_id, **options))
-            return ret
+            kwargs = {
+                'projectId': self.project_id,
+                'jobId': job_id,
+                'maxResults': 0,
+                'timeoutMs': options.get('timeout_ms'),
+            }
+            res = self.request('jobs', 'getQueryResults', **kwargs)
+            return res['jobReference']['jobId']
+        elif options.get('output') in ('columns', 'dataframe'):
+            return self.get_query_columns(job_id, **options)
+        return list(self.iter_query_results(job_id, **options))
 
     def select(self, query, **options):
         kwargs = {
@@ -496,9 +987,14 @@ class BigQuery(GoogleApiClient):
         if options.get('async') is True:
             return job_id
         elif res['jobComplete'] is False:
-            res = self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT))
+            res = self.wait_job(job_id, timeout=options.get('timeout', BigQuery.JOB_WAIT_TIMEOUT), long_poll=True)
 
-        return self.get_query_results(job_id)
+        return self.get_query_results(job_id, typed=options.get('typed', False), output=options.get('output', 'rows'))
 
     def query(self, query, **options):
         return self.select(query, **options)
+
+class AsyncBigQuery(AsyncClient):
+
+    def __init__(self, project_id, **options):
+        super(AsyncBigQuery, self).__init__(BigQuery(project_id, **options), **options)
@@ -0,0 +1,132 @@
+import datetime
+import json
+import threading
+
+from collections import OrderedDict
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+def to_timestamp(v):
+    return EPOCH + datetime.timedelta(seconds=float(v))
+
+def to_boolean(v):
+    return v == 'true'
+
+CONVERTERS = {
+    'INTEGER': int,
+    'INT64': int,
+    'FLOAT': float,
+    'FLOAT64': float,
+    'BOOLEAN': to_boolean,
+    'BOOL': to_boolean,
+    'TIMESTAMP': to_timestamp,
+}
+
+class RowDecoder(object):
+
+    def __init__(self, fields):
+        self.names = [field['name'] for field in fields]
+        self.converters = [self.compile(field) for field in fields]
+        # STRING and the other text types need no conversion, so their cells are copied as they are
+        self.plain = all([converter is None for converter in self.converters])
+
+    def compile(self, field):
+        if field['type'] in ('RECORD', 'STRUCT'):
+            decoder = RowDecoder(field['fields'])
+            convert = lambda v: dict(zip(decoder.names, decoder.decode(v)))
+        else:
+            convert = CONVERTERS.get(field['type'])
+        if field.get('mode') == 'REPEATED':
+            if convert is None:
+                return lambda v: [x['v'] for x in v]
+            return lambda v: [None if x['v'] is None else convert(x['v']) for x in v]
+        if convert is None:
+            return None
+        return lambda v: None if v is None else convert(v)
+
+    def decode(self, row):
+        if self.plain:
+            return [cell['v'] for cell in row['f']]
+        return [cell['v'] if convert is None else convert(cell['v'])
+            for (convert, cell) in zip(self.converters, row['f'])]
+
+    def __call__(self, rows):
+        decode = self.decode
+        return [decode(row) for row in rows]
+
+class DecoderCache(object):
+
+    MAX_SIZE = 128
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.decoders = {}
+
+    def get(self, fields):
+        key = json.dumps(fields, sort_keys=True)
+        with self.lock:
+            decoder = self.decoders.get(key)
+        if decoder is None:
+            decoder = RowDecoder(fields)
+            with self.lock:
+                if len(self.decoders) >= DecoderCache.MAX_SIZE:
+                    self.decoders = {}
+                self.decoders[key] = decoder
+        return decoder
+
+decoders = DecoderCache()
+
+class ColumnBuilder(object):
+
+    def __init__(self, fields, size):
+        # numpy is only needed for columnar output
+        import numpy
+        self.numpy = numpy
+        self.names = [field['name'] for field in fields]
+        self.converters = RowDecoder(fields).converters
+        self.arrays = [numpy.empty(size, dtype=self.dtype(field)) for field in fields]
+        self.count = 0
+
+    def dtype(self, field):
+        if field.get('mode') == 'REPEATED':
+            return object
+        required = field.get('mode') == 'REQUIRED'
+        if field['type'] in ('INTEGER', 'INT64'):
+            # nullable integers are stored as float64 so that NULL can be NaN
+            return 'int64' if required else 'float64'
+        elif field['type'] in ('FLOAT', 'FLOAT64'):
+            return 'float64'
+        elif field['type'] in ('BOOLEAN', 'BOOL'):
+            return bool if required else object
+        elif field['type'] == 'TIMESTAMP':
+            return 'datetime64[us]'
+        return object
+
+    def add(self, rows):
+        numpy = self.numpy
+        (start, end) = (self.count, self.count + len(rows))
+        if self.arrays and end > len(self.arrays[0]):
+            self.arrays = [numpy.concatenate([array, numpy.empty(end - len(array), dtype=array.dtype)])
+                for array in self.arrays]
+        for (i, array) in enumerate(self.arrays):
+            values = [row['f'][i]['v'] for row in rows]
+            if array.dtype.kind in ('i', 'f'):
+                array[start:end] = ['nan' if v is None else v for v in values]
+            elif array.dtype.kind == 'b':
+                array[start:end] = [v == 'true' for v in values]
+            elif array.dtype.kind == 'M':
+                seconds = numpy.array(['nan' if v is None else v for v in values], dtype='float64')
+                microseconds = numpy.where(numpy.isnan(seconds), numpy.iinfo('int64').min, numpy.round(seconds * 1e6))
+                array[start:end] = microseconds.astype('int64').view('datetime64[us]')
+            else:
+                # element-wise, so that list values are not broadcast
+                convert = self.converters[i]
+                for (j, v) in enumerate(values):
+                    array[start + j] = v if convert is None else convert(v)
+        self.count = end
+
+    def columns(self):
+        columns = OrderedDict()
+        for (name, array) in zip(self.names, self.arrays):
+            columns[name] = array[:self.count]
+        return columns
@@ -0,0 +1,837 @@
+import copy
+import csv
+import datetime
+import email.parser
+import gzip
+import httplib2
+import json
+import random
+import re
+import threading
+import time
+
+from oauth2client.client import AccessTokenCredentials
+from StringIO import StringIO
+from urllib import unquote
+from urlparse import parse_qs
+from urlparse import urlparse
+
+ROOT_URL = 'https://bigquery.googleapis.com/'
+SERVICE_PATH = 'bigquery/v2/'
+
+# (resource, method, http method, path, query parameters, request schema, response schema)
+METHODS = [
+    ('datasets', 'delete', 'DELETE', 'projects/{projectId}/datasets/{datasetId}',
+        { 'deleteContents': 'boolean' }, None, None),
+    ('datasets', 'get', 'GET', 'projects/{projectId}/datasets/{datasetId}',
+        {}, None, 'Dataset'),
+    ('datasets', 'insert', 'POST', 'projects/{projectId}/datasets',
+        {}, 'Dataset', 'Dataset'),
+    ('datasets', 'list', 'GET', 'projects/{projectId}/datasets',
+        { 'all': 'boolean', 'maxResults': 'integer', 'pageToken': 'string' }, None, 'DatasetList'),
+    ('jobs', 'cancel', 'POST', 'projects/{projectId}/jobs/{jobId}/cancel',
+        {}, None, 'JobCancelResponse'),
+    ('jobs', 'get', 'GET', 'projects/{projectId}/jobs/{jobId}',
+        {}, None, 'Job'),
+    ('jobs', 'getQueryResults', 'GET', 'projects/{projectId}/queries/{jobId}',
+        { 'maxResults': 'integer', 'pageToken': 'string', 'startIndex': 'string', 'timeoutMs': 'integer' },
+        None, 'GetQueryResultsResponse'),
+    ('jobs', 'insert', 'POST', 'projects/{projectId}/jobs',
+        {}, 'Job', 'Job'),
+    ('jobs', 'list', 'GET', 'projects/{projectId}/jobs',
+        { 'allUsers': 'boolean', 'maxResults': 'integer', 'pageToken': 'string', 'projection': 'string',
+            'stateFilter': 'repeated' }, None, 'JobList'),
+    ('jobs', 'query', 'POST', 'projects/{projectId}/queries',
+        {}, 'QueryRequest', 'QueryResponse'),
+    ('projects', 'list', 'GET', 'projects',
+        { 'maxResults': 'integer', 'pageToken': 'string' }, None, 'ProjectList'),
+    ('tabledata', 'insertAll', 'POST', 'projects/{projectId}/datasets/{datasetId}/tables/{tableId}/insertAll',
+        {}, 'TableDataInsertAllRequest', 'TableDataInsertAllResponse'),
+    ('tabledata', 'list', 'GET', 'projects/{projectId}/datasets/{datasetId}/tables/{tableId}/data',
+        { 'maxResults': 'integer', 'pageToken': 'string', 'startIndex': 'string' }, None, 'TableDataList'),
+    ('tables', 'delete', 'DELETE', 'projects/{projectId}/datasets/{datasetId}/tables/{tableId}',
+        {}, None, None),
+    ('tables', 'get', 'GET', 'projects/{projectId}/datasets/{datasetId}/tables/{tableId}',
+        {}, None, 'Table'),
+    ('tables', 'insert', 'POST', 'projects/{projectId}/datasets/{datasetId}/tables',
+        {}, 'Table', 'Table'),
+    ('tables', 'list', 'GET', 'projects/{projectId}/datasets/{datasetId}/tables',
+        { 'maxResults': 'integer', 'pageToken': 'string' }, None, 'TableList'),
+]
+
+def discovery_document():
+    resources = {}
+    schemas = {}
+    for (resource, method, http_method, path, query_parameters, request, response) in METHODS:
+        parameters = {}
+        for name in re.findall(r'{(\w+)}', path):
+            parameters[name] = { 'type': 'string', 'location': 'path', 'required': True }
+        for (name, parameter_type) in query_parameters.items():
+            if parameter_type == 'repeated':
+                parameters[name] = { 'type': 'string', 'location': 'query', 'repeated': True }
+            else:
+                parameters[name] = { 'type': parameter_type, 'location': 'query' }
+        description = {
+            'id': 'bigquery.%s.%s' % (resource, method),
+            'httpMethod': http_method,
+            'path': path,
+            'parameters': parameters,
+            'parameterOrder': re.findall(r'{(\w+)}', path),
+        }
+        for (key, ref) in [('request', request), ('response', response)]:
+            if ref is not None:
+                description[key] = { '$ref': ref }
+                schemas[ref] = { 'id': ref, 'type': 'object' }
+        if (resource, method) == ('jobs', 'insert'):
+            description['supportsMediaUpload'] = True
+            description['mediaUpload'] = {
+                'accept': ['*/*'],
+                'protocols': {
+                    'simple': { 'multipart': True, 'path': '/upload/bigquery/v2/projects/{projectId}/jobs' },
+                    'resumable': { 'multipart': True, 'path': '/resumable/upload/bigquery/v2/projects/{projectId}/jobs' },
+                },
+            }
+        resources.setdefault(resource, { 'methods': {} })['methods'][method] = description
+    return {
+        'kind': 'discovery#restDescription',
+        'id': 'bigquery:v2',
+        'name': 'bigquery',
+        'version': 'v2',
+        'rootUrl': ROOT_URL,
+        'servicePath': SERVICE_PATH,
+        'batchPath': 'batch/bigquery/v2',
+        'parameters': {
+            'alt': { 'type': 'string', 'location': 'query', 'default': 'json' },
+        },
+        'schemas': schemas,
+        'resources': resources,
+    }
+
+class FakeDiscoveryCache(object):
+
+    def get(self, uri, **options):
+        # build_from_document modifies the document, so every client gets its own copy
+        return discovery_document()
+
+class FakeError(Exception):
+
+    def __init__(self, status, reason, message):
+        super(FakeError, self).__init__(message)
+        self.status = status
+        self.reason = reason
+        self.message = message
+
+def not_found(kind, name):
+    return FakeError(404, 'notFound', 'Not Found: %s %s' % (kind, name))
+
+def already_exists(kind, name):
+    return FakeError(409, 'duplicate', 'Already Exists: %s %s' % (kind, name))
+
+def invalid(message):
+    return FakeError(400, 'invalid', message)
+
+class FakeBigQueryHttp(object):
+
+    def __init__(self, **options):
+        self.latency = options.get('latency', 0)
+        self.error_rate = options.get('error_rate', 0)
+        self.error_status = options.get('error_status', 503)
+        self.error_reason = options.get('error_reason', 'backendError')
+        self.job_duration = options.get('job_duration', 0)
+        self.max_page_rows = options.get('max_page_rows')
+        self.random = random.Random(options.get('seed', 0))
+        self.lock = threading.RLock()
+        self.datasets = {}
+        self.tables = {}
+        self.jobs = {}
+        self.query_results = {}
+        self.uploads = {}
+        self.upload_count = 0
+        self.injected_errors = []
+        self.injected_job_errors = []
+        self.calls = {}
+        self.job_count = 0
+
+    def options(self):
+        return {
+            'http': self,
+            'discovery_cache': FakeDiscoveryCache(),
+            'credentials': AccessTokenCredentials('fake-access-token', 'google-api-clients-fake'),
+        }
+
+    def add_query_result(self, query, schema, rows):
+        with self.lock:
+            self.query_results[query.strip()] = (schema, rows)
+
+    def inject_error(self, method_id, status=503, reason='backendError', count=1, message='Injected error'):
+        with self.lock:
+            self.injected_errors.append([method_id, status, reason, count, message])
+
+    def inject_job_error(self, reason='quotaExceeded', count=1, message='Injected job error'):
+        # the next jobs are created but finish with the error
+        with self.lock:
+            self.injected_job_errors.append([reason, count, message])
+
+    def request(self, uri, method='GET', body=None, headers=None, redirections=None, connection_type=None):
+        if callable(self.latency):
+            time.sleep(self.latency())
+        elif self.latency:
+            time.sleep(self.latency)
+
+        url = urlparse(uri)
+        headers = dict([(k.lower(), v) for (k, v) in (headers or {}).items()])
+        if url.path.startswith('/batch/'):
+            return self.batch(body, headers)
+
+        (status, resp_headers, content) = self.dispatch(method, url.path, parse_qs(url.query), body, headers)
+        resp_headers['status'] = status
+        resp_headers.setdefault('content-type', 'application/json; charset=UTF-8')
+        return (httplib2.Response(resp_headers), content)
+
+    def dispatch(self, http_method, path, query, body, headers):
+        try:
+            (method_id, handler, args) = self.route(http_method, path)
+            with self.lock:
+                self.calls[method_id] = self.calls.get(method_id, 0) + 1
+                self.raise_injected_error(method_id)
+            res = handler(query, body, headers, *args)
+            if type(res) is tuple:
+                return res
+            return (200, {}, json.dumps(res) if res is not None else '')
+        except FakeError as e:
+            return self.error_response(e)
+
+    def error_response(self, e):
+        content = {
+            'error': {
+                'errors': [ { 'domain': 'global', 'reason': e.reason, 'message': e.message } ],
+                'code': e.status,
+                'message': e.message,
+            }
+        }
+        return (e.status, {}, json.dumps(content))
+
+    def raise_injected_error(self, method_id):
+        for error in self.injected_errors:
+            if error[0] == method_id and error[3] > 0:
+                error[3] -= 1
+                raise FakeError(error[1], error[2], error[4])
+        if self.error_rate and self.random.random() < self.error_rate:
+            raise FakeError(self.error_status, self.error_reason, 'Injected error')
+
+    def route(self, http_method, path):
+        path = unquote(path)
+        routes = [
+            ('POST', r'/resumable/upload/bigquery/v2/projects/([^/]+)/jobs', 'jobs.insert', self.jobs_insert_upload),
+            ('PUT', r'/resumable/upload/bigquery/v2/projects/([^/]+)/jobs', 'jobs.insert.upload', self.jobs_insert_resumable),
+            ('POST', r'/upload/bigquery/v2/projects/([^/]+)/jobs', 'jobs.insert', self.jobs_insert_upload),
+            ('GET', r'/bigquery/v2/projects', 'projects.list', self.projects_list),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/datasets', 'datasets.list', self.datasets_list),
+            ('POST', r'/bigquery/v2/projects/([^/]+)/datasets', 'datasets.insert', self.datasets_insert),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)', 'datasets.get', self.datasets_get),
+            ('DELETE', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)', 'datasets.delete', self.datasets_delete),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)/tables', 'tables.list', self.tables_list),
+            ('POST', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)/tables', 'tables.insert', self.tables_insert),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)/tables/([^/]+)', 'tables.get', self.tables_get),
+            ('DELETE', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)/tables/([^/]+)', 'tables.delete', self.tables_delete),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)/tables/([^/]+)/data', 'tabledata.list', self.tabledata_list),
+            ('POST', r'/bigquery/v2/projects/([^/]+)/datasets/([^/]+)/tables/([^/]+)/insertAll', 'tabledata.insertAll', self.tabledata_insert_all),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/jobs', 'jobs.list', self.jobs_list),
+            ('POST', r'/bigquery/v2/projects/([^/]+)/jobs', 'jobs.insert', self.jobs_insert),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/jobs/([^/]+)', 'jobs.get', self.jobs_get),
+            ('POST', r'/bigquery/v2/projects/([^/]+)/jobs/([^/]+)/cancel', 'jobs.cancel', self.jobs_cancel),
+            ('POST', r'/bigquery/v2/projects/([^/]+)/queries', 'jobs.query', self.jobs_query),
+            ('GET', r'/bigquery/v2/projects/([^/]+)/queries/([^/]+)', 'jobs.getQueryResults', self.jobs_get_query_results),
+        ]
+        for (route_method, pattern, method_id, handler) in routes:
+            m = re.match(pattern + '$', path)
+            if m and route_method == http_method:
+                return (method_id, handler, m.groups())
+        raise FakeError(404, 'notFound', 'Not Found: %s %s' % (http_method, path))
+
+    def batch(self, body, headers):
+        with self.lock:
+            self.calls['batch'] = self.calls.get('batch', 0) + 1
+            try:
+                self.raise_injected_error('batch')
+            except FakeError as e:
+                (status, resp_headers, content) = self.error_response(e)
+                return (httplib2.Response({ 'status': status, 'content-type': 'application/json; charset=UTF-8' }), content)
+        message = email.parser.Parser().parsestr('Content-Type: ' + headers['content-type'] + '\r\n\r\n' + body)
+        parts = []
+        for part in message.get_payload():
+            (request_line, rest) = part.get_payload().split('\n', 1)
+            (http_method, path) = request_line.split(' ')[:2]
+            (part_headers, part_body) = (rest.split('\r\n\r\n', 1) + [''])[:2] if '\r\n\r\n' in rest \
+                else (rest.split('\n\n', 1) + [''])[:2]
+            part_headers = dict([x.strip().split(': ', 1) for x in part_headers.splitlines() if ': ' in x])
+            url = urlparse(path)
+            (status, resp_headers, content) = self.dispatch(http_method, url.path, parse_qs(url.query),
+                part_body or None, dict((k.lower(), v) for (k, v) in part_headers.items()))
+            parts.append('--batch_boundary\r\nContent-Type: application/http\r\n'
+                + 'Content-ID: <response-%s>\r\n\r\n' % part['Content-ID'][1:-1]
+                + 'HTTP/1.1 %d %s\r\nContent-Type: application/json; charset=UTF-8\r\n\r\n%s\r\n'
+                % (status, httplib2.httplib.responses.get(status, ''), content))
+        content = ''.join(parts) + '--batch_boundary--'
+        return (httplib2.Response({ 'status': 200, 'content-type': 'multipart/mixed; boundary=batch_boundary' }), content)
+
+    # projects
+
+    def projects_list(self, query, body, headers):
+        with self.lock:
+            project_ids = sorted(set([x[0] for x in self.datasets] + [x[0] for x in self.jobs]))
+        return {
+            'kind': 'bigquery#projectList',
+            'projects': [ { 'id': x, 'projectReference': { 'projectId': x } } for x in project_ids ],
+            'totalItems': len(project_ids),
+        }
+
+    # datasets
+
+    def datasets_insert(self, query, body, headers, project_id):
+        resource = json.loads(body)
+        dataset_id = resource['datasetReference']['datasetId']
+        with self.lock:
+            if (project_id, dataset_id) in self.datasets:
+                raise already_exists('Dataset', '%s:%s' % (project_id, dataset_id))
+            resource.update({
+                'kind': 'bigquery#dataset',
+                'id': '%s:%s' % (project_id, dataset_id),
+                'datasetReference': { 'projectId': project_id, 'datasetId': dataset_id },
+                'creationTime': str(int(time.time() * 1000)),
+            })
+            self.datasets[(project_id, dataset_id)] = dict((k, v) for (k, v) in resource.items() if v is not None)
+            return self.datasets[(project_id, dataset_id)]
+
+    def datasets_get(self, query, body, headers, project_id, dataset_id):
+        with self.lock:
+            return self.dataset(project_id, dataset_id)
+
+    def datasets_delete(self, query, body, headers, project_id, dataset_id):
+        with self.lock:
+            self.dataset(project_id, dataset_id)
+            tables = [x for x in self.tables if x[:2] == (project_id, dataset_id)]
+            if tables and query.get('deleteContents', ['false'])[0] != 'true':
+                raise invalid('Dataset %s:%s is still in use' % (project_id, dataset_id))
+            for key in tables:
+                del self.tables[key]
+            del self.datasets[(project_id, dataset_id)]
+        return (204, {}, '')
+
+    def datasets_list(self, query, body, headers, project_id):
+        with self.lock:
+            datasets = [self.datasets[x] for x in sorted(self.datasets) if x[0] == project_id]
+            (page, page_token) = self.page(datasets, query)
+        res = {
+            'kind': 'bigquery#datasetList',
+            'datasets': [ { 'id': x['id'], 'datasetReference': x['datasetReference'] } for x in page ],
+        }
+        if page_token is not None:
+            res['nextPageToken'] = page_token
+        if not page:
+            del res['datasets']
+        return res
+
+    def dataset(self, project_id, dataset_id):
+        if (project_id, dataset_id) not in self.datasets:
+            raise not_found('Dataset', '%s:%s' % (project_id, dataset_id))
+        return self.datasets[(project_id, dataset_id)]
+
+    # tables
+
+    def tables_insert(self, query, body, headers, project_id, dataset_id):
+        resource = json.loads(body)
+        table_id = resource['tableReference']['tableId']
+        with self.lock:
+            self.create_table(project_id, dataset_id, table_id, resource)
+            return self.table_resource(project_id, dataset_id, table_id)
+
+    def tables_get(self, query, body, headers, project_id, dataset_id, table_id):
+        with self.lock:
+            return self.table_resource(project_id, dataset_id, table_id)
+
+    def tables_delete(self, query, body, headers, project_id, dataset_id, table_id):
+        with self.lock:
+            self.table(project_id, dataset_id, table_id)
+            del self.tables[(project_id, dataset_id, table_id)]
+        return (204, {}, '')
+
+    def tables_list(self, query, body, headers, project_id, dataset_id):
+        with self.lock:
+            self.dataset(project_id, dataset_id)
+            tables = [self.table_resource(*x) for x in sorted(self.tables) if x[:2] == (project_id, dataset_id)]
+            (page, page_token) = self.page(tables, query)
+        res = {
+            'kind': 'bigquery#tableList',
+            'tables': [ { 'id': x['id'], 'tableReference': x['tableReference'], 'type': x['type'] } for x in page ],
+            'totalItems': len(tables),
+        }
+        if page_token is not None:
+            res['nextPageToken'] = page_token
+        if not page:
+            del res['tables']
+        return res
+
+    def create_table(self, project_id, dataset_id, table_id, resource):
+        self.dataset(project_id, dataset_id)
+        if (project_id, dataset_id, table_id) in self.tables:
+            raise already_exists('Table', '%s:%s.%s' % (project_id, dataset_id, table_id))
+        resource = dict((k, v) for (k, v) in resource.items() if v is not None)
+        resource.update({
+            'kind': 'bigquery#table',
+            'id': '%s:%s.%s' % (project_id, dataset_id, table_id),
+            'tableReference': { 'projectId': project_id, 'datasetId': dataset_id, 'tableId': table_id },
+            'type': 'VIEW' if 'view' in resource else 'TABLE',
+            'creationTime': str(int(time.time() * 1000)),
+        })
+        resource.setdefault('schema', { 'fields': [] })
+        self.tables[(project_id, dataset_id, table_id)] = { 'resource': resource, 'rows': [], 'insert_ids': set() }
+
+    def table(self, project_id, dataset_id, table_id):
+        if (project_id, dataset_id, table_id) not in self.tables:
+            raise not_found('Table', '%s:%s.%s' % (project_id, dataset_id, table_id))
+        return self.tables[(project_id, dataset_id, table_id)]
+
+    def table_resource(self, project_id, dataset_id, table_id):
+        table = self.table(project_id, dataset_id, table_id)
+        resource = copy.deepcopy(table['resource'])
+        resource['numRows'] = str(len(table['rows']))
+        resource['numBytes'] = str(sum([len(json.dumps(x)) for x in table['rows']]))
+        return resource
+
+    # tabledata
+
+    def tabledata_insert_all(self, query, body, headers, project_id, dataset_id, table_id):
+        request = json.loads(body)
+        with self.lock:
+            table = self.table(project_id, dataset_id, table_id)
+            fields = table['resource']['schema']['fields']
+            (rows, insert_errors) = ([], [])
+            for (index, row) in enumerate(request.get('rows', [])):
+                (value, errors) = self.normalize(fields, row['json'], request.get('ignoreUnknownValues', False))
+                if errors:
+                    insert_errors.append({ 'index': index, 'errors': errors })
+                else:
+                    rows.append((index, row.get('insertId'), value))
+            if insert_errors and not request.get('skipInvalidRows', False):
+                failed = set([x['index'] for x in insert_errors])
+                for (index, insert_id, value) in rows:
+                    if index not in failed:
+                        insert_errors.append({ 'index': index, 'errors': [
+                            { 'reason': 'stopped', 'location': '', 'debugInfo': '', 'message': '' } ] })
+                insert_errors.sort(key=lambda x: x['index'])
+                rows = []
+            for (index, insert_id, value) in rows:
+                if insert_id is not None:
+                    if insert_id in table['insert_ids']:
+                        continue
+                    table['insert_ids'].add(insert_id)
+                table['rows'].append(value)
+        res = { 'kind': 'bigquery#tableDataInsertAllResponse' }
+        if insert_errors:
+            res['insertErrors'] = insert_errors
+        return res
+
+    def tabledata_list(self, query, body, headers, project_id, dataset_id, table_id):
+        with self.lock:
+            table = self.table(project_id, dataset_id, table_id)
+            fields = table['resource']['schema']['fields']
+            (page, page_token) = self.page(table['rows'], query)
+            res = {
+                'kind': 'bigquery#tableDataList',
+                'totalRows': str(len(table['rows'])),
+                'rows': [self.encode(fields, x) for x in page],
+            }
+        if page_token is not None:
+            res['pageToken'] = page_token
+        if not page:
+            del res['rows']
+        return res
+
+    # jobs
+
+    def jobs_insert(self, query, body, headers, project_id):
+        with self.lock:
+            return self.job_resource(self.create_job(project_id, json.loads(body), None))
+
+    def jobs_insert_upload(self, query, body, headers, project_id):
+        if query.get('uploadType') == ['resumable']:
+            with self.lock:
+                self.upload_count += 1
+                upload_id = 'upload_fake_%06d' % self.upload_count
+                self.uploads[upload_id] = {
+                    'project_id': project_id,
+                    'metadata': json.loads(body or '{}'),
+                    'data': [],
+                    'size': 0,
+                    'job': None,
+                }
+            location = '%sresumable/upload/bigquery/v2/projects/%s/jobs?uploadType=resumable&upload_id=%s' \
+                % (ROOT_URL, project_id, upload_id)
+            return (200, { 'location': location }, '')
+        if 'multipart/related' not in headers.get('content-type', ''):
+            raise invalid('Only multipart and resumable uploads are supported')
+        message = email.parser.Parser().parsestr('Content-Type: ' + headers['content-type'] + '\r\n\r\n' + body)
+        (metadata, media) = [x.get_payload() for x in message.get_payload()]
+        with self.lock:
+            return self.job_resource(self.create_job(project_id, json.loads(metadata), media))
+
+    def jobs_insert_resumable(self, query, body, headers, project_id):
+        upload_id = query.get('upload_id', [None])[0]
+        m = re.match(r'bytes (?:\*|(\d+)-(\d+))/(\*|\d+)$', headers.get('content-range', ''))
+        if m is None:
+            raise invalid('Invalid Content-Range')
+        if hasattr(body, 'read'):
+            body = body.read()
+        with self.lock:
+            if upload_id not in self.uploads:
+                raise not_found('Upload', upload_id)
+            upload = self.uploads[upload_id]
+            if upload['job'] is None and m.group(1) is not None:
+                (first, total) = (int(m.group(1)), m.group(3))
+                if int(m.group(2)) < first:
+                    raise invalid('Invalid Content-Range: %s' % headers['content-range'])
+                if first > upload['size']:
+                    raise invalid('Chunk starts at %d, but only %d bytes were received' % (first, upload['size']))
+                # a resent chunk may overlap the bytes already received
+                data = (body or '')[upload['size'] - first:]
+                upload['data'].append(data)
+                upload['size'] += len(data)
+                if total != '*' and upload['size'] >= int(total):
+                    upload['job'] = self.create_job(upload['project_id'], upload['metadata'], ''.join(upload['data']))
+            elif upload['job'] is None and m.group(3) != '*' and int(m.group(3)) == upload['size']:
+                # bytes */total finishes an upload whose bytes have all been received
+                upload['job'] = self.create_job(upload['project_id'], upload['metadata'], ''.join(upload['data']))
+            if upload['job'] is not None:
+                return (200, {}, json.dumps(self.job_resource(upload['job'])))
+            if upload['size'] == 0:
+                return (308, {}, '')
+            return (308, { 'range': 'bytes=0-%d' % (upload['size'] - 1) }, '')
+
+    def jobs_get(self, query, body, headers, project_id, job_id):
+        with self.lock:
+            return self.job_resource(self.job(project_id, job_id))
+
+    def jobs_cancel(self, query, body, headers, project_id, job_id):
+        with self.lock:
+            job = self.job(project_id, job_id)
+            job['done_at'] = min(job['done_at'], time.time())
+            return { 'kind': 'bigquery#jobCancelResponse', 'job': self.job_resource(job) }
+
+    def jobs_list(self, query, body, headers, project_id):
+        state_filter = [x.upper() for x in query.get('stateFilter', [])]
+        with self.lock:
+            jobs = [self.job_resource(x) for x in sorted(self.jobs.values(), key=lambda x: -x['created'])
+                if x['resource']['jobReference']['projectId'] == project_id]
+            jobs = [x for x in jobs if not state_filter or x['status']['state'] in state_filter]
+            (page, page_token) = self.page(jobs, query)
+        res = {
+            'kind': 'bigquery#jobList',
+            'jobs': [dict(x, state=x['status']['state']) for x in page],
+        }
+        if page_token is not None:
+            res['nextPageToken'] = page_token
+        return res
+
+    def jobs_query(self, query, body, headers, project_id):
+        request = json.loads(body)
+        configuration = {
+            'query': {
+                'query': request['query'],
+                'defaultDataset': request.get('defaultDataset'),
+            }
+        }
+        with self.lock:
+            job = self.create_job(project_id, { 'configuration': configuration }, None)
+            if job['error'] is not None:
+                raise job['error']
+            job_reference = job['resource']['jobReference']
+        if request.get('dryRun'):
+            return { 'kind': 'bigquery#queryResponse', 'jobReference': job_reference, 'jobComplete': True }
+        query = { 'maxResults': [str(request['maxResults'])] } if request.get('maxResults') else {}
+        if request.get('timeoutMs') is not None:
+            query['timeoutMs'] = [str(request['timeoutMs'])]
+        res = self.jobs_get_query_results(query, None, headers, project_id, job_reference['jobId'])
+        res['kind'] = 'bigquery#queryResponse'
+        return res
+
+    def jobs_get_query_results(self, query, body, headers, project_id, job_id):
+        with self.lock:
+            job = self.job(project_id, job_id)
+            remaining = job['done_at'] - time.time()
+        timeout = int(query.get('timeoutMs', ['10000'])[0]) / 1000.0
+        if remaining > 0:
+            time.sleep(min(remaining, timeout))
+        with self.lock:
+            res = {
+                'kind': 'bigquery#getQueryResultsResponse',
+                'jobReference': job['resource']['jobReference'],
+                'jobComplete': time.time() >= job['done_at'],
+            }
+            if not res['jobComplete']:
+                return res
+            if job['error'] is not None:
+                raise job['error']
+            (fields, rows) = job['result']
+            (page, page_token) = self.page(rows, query)
+            res.update({
+                'schema': { 'fields': fields },
+                'totalRows': str(len(rows)),
+                'rows': [self.encode(fields, x) for x in page],
+                'totalBytesProcessed': '0',
+                'cacheHit': False,
+            })
+        if page_token is not None:
+            res['pageToken'] = page_token
+        if not page:
+            del res['rows']
+        return res
+
+    def create_job(self, project_id, resource, media):
+        resource = copy.deepcopy(resource)
+        job_reference = resource.get('jobReference') or {}
+        job_id = job_reference.get('jobId')
+        if job_id is None:
+            self.job_count += 1
+            job_id = 'job_fake_%06d' % self.job_count
+        if (project_id, job_id) in self.jobs:
+            raise already_exists('Job', '%s:%s' % (project_id, job_id))
+        resource.update({
+            'kind': 'bigquery#job',
+            'id': '%s:%s' % (project_id, job_id),
+            'jobReference': { 'projectId': project_id, 'jobId': job_id },
+        })
+        job = {
+            'resource': resource,
+            'created': time.time(),
+            'done_at': time.time() + (self.job_duration() if callable(self.job_duration) else self.job_duration),
+            'result': None,
+            'error': None,
+        }
+        try:
+            configuration = resource.get('configuration', {})
+            if 'query' in configuration:
+                job['result'] = self.run_query(project_id, configuration['query'])
+            elif 'load' in configuration:
+                self.run_load(configuration['load'], media)
+            elif 'extract' in configuration:
+                self.table(**self.table_reference(configuration['extract']['sourceTable']))
+        except FakeError as e:
+            job['error'] = e
+        with self.lock:
+            for error in self.injected_job_errors:
+                if error[1] > 0:
+                    error[1] -= 1
+                    job['error'] = FakeError(400, error[0], error[2])
+                    break
+        self.jobs[(project_id, job_id)] = job
+        return job
+
+    def job(self, project_id, job_id):
+        if (project_id, job_id) not in self.jobs:
+            raise not_found('Job', '%s:%s' % (project_id, job_id))
+        return self.jobs[(project_id, job_id)]
+
+    def job_resource(self, job):
+        resource = copy.deepcopy(job['resource'])
+        done = time.time() >= job['done_at']
+        resource['status'] = { 'state': 'DONE' if done else 'RUNNING' }
+        if done and job['error'] is not None:
+            error = { 'reason': job['error'].reason, 'message': job['error'].message }
+            resource['status']['errorResult'] = error
+            resource['status']['errors'] = [error]
+        resource['statistics'] = {
+            'creationTime': str(int(job['created'] * 1000)),
+            'startTime': str(int(job['created'] * 1000)),
+        }
+        if done:
+            resource['statistics']['endTime'] = str(int(job['done_at'] * 1000))
+        return resource
+
+    def table_reference(self, reference, project_id=None, dataset_id=None):
+        return {
+            'project_id': reference.get('projectId') or project_id,
+            'dataset_id': reference.get('datasetId') or dataset_id,
+            'table_id': reference['tableId'],
+        }
+
+    def run_query(self, project_id, configuration):
+        query = configuration['query'].strip()
+        if query in self.query_results:
+            (fields, rows) = copy.deepcopy(self.query_results[query])
+        else:
+            (fields, rows) = self.select(project_id, query, configuration.get('defaultDataset') or {})
+        if configuration.get('destinationTable'):
+            reference = self.table_reference(configuration['destinationTable'], project_id)
+            self.write(reference, fields, rows,
+                configuration.get('createDisposition', 'CREATE_IF_NEEDED'),
+                configuration.get('writeDisposition', 'WRITE_EMPTY'))
+        return (fields, rows)
+
+    def select(self, project_id, query, default_dataset):
+        m = re.match(r'SELECT\s+(.+?)\s+FROM\s+[\[`]?(?:([\w-]+)[:.])?(?:(\w+)\.)?(\w+)[\]`]?'
+            + r'(?:\s+LIMIT\s+(\d+))?\s*;?$', query, re.I | re.S)
+        if m is None:
+            raise invalid('Unsupported query: %s' % query)
+        (columns, table_project_id, dataset_id, table_id, limit) = m.groups()
+        if dataset_id is None and table_project_id is not None:
+            (table_project_id, dataset_id) = (None, table_project_id)
+        table = self.table(table_project_id or default_dataset.get('projectId') or project_id,
+            dataset_id or default_dataset.get('datasetId'), table_id)
+        fields = table['resource']['schema']['fields']
+        if columns.strip() != '*':
+            names = [x.strip() for x in columns.split(',')]
+            unknown = [x for x in names if x not in [y['name'] for y in fields]]
+            if unknown:
+                raise invalid('Field \'%s\' not found.' % unknown[0])
+            fields = [x for x in fields if x['name'] in names]
+        rows = [dict((x['name'], row.get(x['name'])) for x in fields) for row in table['rows']]
+        if limit is not None:
+            rows = rows[:int(limit)]
+        return (copy.deepcopy(fields), copy.deepcopy(rows))
+
+    def run_load(self, configuration, media):
+        reference = self.table_reference(configuration['destinationTable'])
+        if configuration.get('sourceUris'):
+            raise not_found('URI', configuration['sourceUris'][0])
+        if media is None:
+            raise invalid('No data to load')
+        if media[:2] == '\x1f\x8b':
+            media = gzip.GzipFile(fileobj=StringIO(media)).read()
+
+        fields = (configuration.get('schema') or {}).get('fields')
+        if fields is None and (reference['project_id'], reference['dataset_id'], reference['table_id']) in self.tables:
+            fields = self.table(**reference)['resource']['schema']['fields']
+        if fields is None:
+            raise invalid('No schema specified on job or table.')
+
+        if configuration.get('sourceFormat') == 'NEWLINE_DELIMITED_JSON':
+            records = [json.loads(x) for x in media.splitlines() if x.strip()]
+        else:
+            lines = media.splitlines()[int(configuration.get('skipLeadingRows') or 0):]
+            reader = csv.reader(lines, delimiter=str(configuration.get('fieldDelimiter') or ','))
+            records = [dict(zip([x['name'] for x in fields], [y if y != '' else None for y in row])) for row in reader]
+
+        (rows, bad_records) = ([], 0)
+        for record in records:
+            (value, errors) = self.normalize(fields, record, configuration.get('ignoreUnknownValues', False))
+            if errors:
+                bad_records += 1
+            else:
+                rows.append(value)
+        if bad_records > int(configuration.get('maxBadRecords') or 0):
+            raise invalid('Too many errors encountered.')
+
+        self.write(reference, fields, rows,
+            configuration.get('createDisposition', 'CREATE_IF_NEEDED'),
+            configuration.get('writeDisposition', 'WRITE_APPEND'))
+
+    def write(self, reference, fields, rows, create_disposition, write_disposition):
+        key = (reference['project_id'], reference['dataset_id'], reference['table_id'])
+        if key not in self.tables:
+            if create_disposition == 'CREATE_NEVER':
+                raise not_found('Table', '%s:%s.%s' % key)
+            self.create_table(key[0], key[1], key[2], {
+                'tableReference': { 'tableId': key[2] },
+                'schema': { 'fields': copy.deepcopy(fields) },
+            })
+        table = self.tables[key]
+        if write_disposition == 'WRITE_EMPTY' and table['rows']:
+            raise FakeError(409, 'duplicate', 'Already Exists: Table %s:%s.%s' % key)
+        elif write_disposition == 'WRITE_TRUNCATE':
+            table['rows'] = []
+        table['rows'].extend(rows)
+
+    def page(self, items, query):
+        if 'pageToken' in query:
+            start = int(query['pageToken'][0])
+        else:
+            start = int(query.get('startIndex', ['0'])[0])
+        size = int(query.get('maxResults', ['100000'])[0])
+        if self.max_page_rows is not None:
+            size = min(size, self.max_page_rows)
+        page = items[start:start + size]
+        page_token = str(start + len(page)) if start + len(page) < len(items) else None
+        return (page, page_token)
+
+    # row encoding
+
+    def normalize(self, fields, row, ignore_unknown_values):
+        (value, errors) = ({}, [])
+        names = [x['name'] for x in fields]
+        for name in row:
+            if name not in names and not ignore_unknown_values:
+                errors.append({ 'reason': 'invalid', 'location': name, 'debugInfo': '', 'message': 'no such field.' })
+        for field in fields:
+            v = row.get(field['name'])
+            mode = field.get('mode', 'NULLABLE')
+            if v is None:
+                if mode == 'REQUIRED':
+                    errors.append({ 'reason': 'invalid', 'location': field['name'], 'debugInfo': '',
+                        'message': 'Missing required field: %s.' % field['name'] })
+                value[field['name']] = [] if mode == 'REPEATED' else None
+                continue
+            try:
+                if mode == 'REPEATED':
+                    value[field['name']] = [self.normalize_value(field, x, ignore_unknown_values) for x in v]
+                else:
+                    value[field['name']] = self.normalize_value(field, v, ignore_unknown_values)
+            except (TypeError, ValueError) as e:
+                errors.append({ 'reason': 'invalid', 'location': field['name'], 'debugInfo': '', 'message': str(e) })
+        return (value, errors)
+
+    def normalize_value(self, field, v, ignore_unknown_values):
+        field_type = field['type']
+        if field_type in ('RECORD', 'STRUCT'):
+            (value, errors) = self.normalize(field['fields'], v, ignore_unknown_values)
+            if errors:
+                raise ValueError(errors[0]['message'])
+            return value
+        elif field_type in ('INTEGER', 'INT64'):
+            if type(v) is float or type(v) is bool:
+                raise ValueError('Cannot convert value to integer.')
+            try:
+                return int(v)
+            except ValueError:
+                raise ValueError('Cannot convert value to integer.')
+        elif field_type in ('FLOAT', 'FLOAT64'):
+            try:
+                return float(v)
+            except ValueError:
+                raise ValueError('Cannot convert value to floating point.')
+        elif field_type in ('BOOLEAN', 'BOOL'):
+            if type(v) is bool:
+                return v
+            if str(v).lower() in ('true', '1'):
+                return True
+            if str(v).lower() in ('false', '0'):
+                return False
+            raise ValueError('Cannot convert value to boolean.')
+        elif field_type == 'TIMESTAMP':
+            if isinstance(v, (int, long, float)):
+                return float(v)
+            m = re.match(r'(\d{4}-\d{2}-\d{2})[ T](\d{2}:\d{2}:\d{2})(\.\d+)?(?: ?UTC| ?Z)?$', v)
+            if m is None:
+                raise ValueError('Cannot convert value to timestamp.')
+            t = datetime.datetime.strptime(m.group(1) + ' ' + m.group(2), '%Y-%m-%d %H:%M:%S')
+            return (t - datetime.datetime(1970, 1, 1)).total_seconds() + float(m.group(3) or 0)
+        return unicode(v)
+
+    def encode(self, fields, row):
+        return { 'f': [ { 'v': self.encode_value(x, row.get(x['name'])) } for x in fields ] }
+
+    def encode_value(self, field, v):
+        if field.get('mode') == 'REPEATED':
+            return [ { 'v': self.encode_scalar(field, x) } for x in v or [] ]
+        return self.encode_scalar(field, v)
+
+    def encode_scalar(self, field, v):
+        if v is None:
+            return None
+        elif field['type'] in ('RECORD', 'STRUCT'):
+            return self.encode(field['fields'], v)
+        elif field['type'] in ('BOOLEAN', 'BOOL'):
+            return 'true' if v else 'false'
+        elif field['type'] in ('FLOAT', 'FLOAT64', 'TIMESTAMP'):
+            return repr(float(v))
+        return unicode(v)
@@ -0,0 +1,110 @@
+import json
+import threading
+import time
+
+from .errors import BigQueryError
+
+class Inserter(object):
+
+    MAX_ROWS = 500
+    MAX_BYTES = 1024 * 1024
+    MAX_LATENCY = 1.0
+    MAX_BUFFER_ROWS = 10000
+
+    def __init__(self, client, table_id, **options):
+        self.client = client
+        self.table_id = table_id
+        self.max_rows = options.get('max_rows', Inserter.MAX_ROWS)
+        self.max_bytes = options.get('max_bytes', Inserter.MAX_BYTES)
+        self.max_latency = options.get('max_latency', Inserter.MAX_LATENCY)
+        self.max_buffer_rows = max(options.get('max_buffer_rows', Inserter.MAX_BUFFER_ROWS), self.max_rows)
+        self.on_error = options.get('on_error')
+        self.insert_options = dict([(k, v) for (k, v) in options.items()
+            if k not in ('max_latency', 'max_buffer_rows', 'on_error')])
+        self.condition = threading.Condition()
+        self.rows = []
+        self.bytes = 0
+        self.first_added = None
+        self.added = 0
+        self.sent = 0
+        self.flushing = 0
+        self.errors = []
+        self.closed = False
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def add(self, row):
+        size = len(json.dumps(row))
+        with self.condition:
+            if self.closed:
+                raise BigQueryError('Inserter is closed')
+            # block the caller while the buffer is full
+            while len(self.rows) >= self.max_buffer_rows:
+                self.condition.wait()
+            if not self.rows:
+                self.first_added = time.time()
+            self.rows.append(row)
+            self.bytes += size
+            self.added += 1
+            # the first row starts the latency timer of the background thread
+            if len(self.rows) == 1 or len(self.rows) >= self.max_rows or self.bytes >= self.max_bytes:
+                self.condition.notify_all()
+
+    def ready(self):
+        if not self.rows:
+            return False
+        return self.closed or self.flushing > self.sent or len(self.rows) >= self.max_rows \
+            or self.bytes >= self.max_bytes or time.time() - self.first_added >= self.max_latency
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.ready():
+                    if self.closed:
+                        return
+                    if self.rows:
+                        self.condition.wait(max(self.first_added + self.max_latency - time.time(), 0.001))
+                    else:
+                        self.condition.wait()
+                (rows, self.rows, self.bytes) = (self.rows, [], 0)
+                # adders blocked on a full buffer can continue while the rows are sent
+                self.condition.notify_all()
+            try:
+                self.client.insert(self.table_id, rows, **self.insert_options)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e, rows)
+                else:
+                    with self.condition:
+                        self.errors.append(e)
+            with self.condition:
+                self.sent += len(rows)
+                self.condition.notify_all()
+
+    def flush(self):
+        with self.condition:
+            target = self.added
+            self.flushing = max(self.flushing, target)
+            self.condition.notify_all()
+            while self.sent < target and self.thread.is_alive():
+                self.condition.wait()
+            (errors, self.errors) = (self.errors, [])
+        if errors:
+            raise errors[0]
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            with self.condition:
+                self.closed = True
+                self.condition.notify_all()
+            self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
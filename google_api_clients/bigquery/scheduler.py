@@ -0,0 +1,256 @@
+import heapq
+import itertools
+import threading
+import time
+
+from googleapiclient.errors import HttpError
+from multiprocessing.pool import ThreadPool
+from types import DictionaryType
+from types import ListType
+
+from ..retry import RetryPolicy
+from .errors import BigQueryError
+from .errors import JobWaitTimeoutError
+
+class JobFuture(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.job_id = None
+        self.attempts = 0
+        self.value = None
+        self.error = None
+
+    def done(self):
+        return self.event.is_set()
+
+    def result(self, timeout=None):
+        if not self.event.wait(timeout):
+            raise JobWaitTimeoutError('timeout: ' + str(timeout) + 'sec')
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+class Scheduler(object):
+
+    MAX_JOBS = 4
+    MAX_WORKERS = 4
+    MAX_ATTEMPTS = 5
+    RETRY_DELAY = 1.0
+    POLL_INTERVAL = 1.0
+    PRIORITIES = ('INTERACTIVE', 'BATCH')
+    METHODS = ('load', 'insert_from_select', 'extract', 'select')
+    RETRYABLE_REASONS = ('rateLimitExceeded', 'quotaExceeded')
+
+    def __init__(self, client, **options):
+        self.client = client
+        self.max_jobs = options.get('max_jobs', Scheduler.MAX_JOBS)
+        self.max_attempts = options.get('max_attempts', Scheduler.MAX_ATTEMPTS)
+        self.retry_delay = options.get('retry_delay', Scheduler.RETRY_DELAY)
+        self.poll_interval = options.get('poll_interval', Scheduler.POLL_INTERVAL)
+        self.pool = ThreadPool(options.get('max_workers', Scheduler.MAX_WORKERS))
+        self.condition = threading.Condition()
+        self.counter = itertools.count()
+        self.pending = []
+        self.running = []
+        self.counts = {}
+        self.futures = []
+        self.closed = False
+        self.thread = threading.Thread(target=self.run)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, method, *args, **options):
+        if method not in Scheduler.METHODS:
+            raise BigQueryError('Unknown method: ' + method)
+        priority = options.get('priority', 'INTERACTIVE')
+        if priority not in Scheduler.PRIORITIES:
+            raise BigQueryError('Unknown priority: ' + priority)
+        client = options.pop('client', self.client)
+        timeout = options.pop('timeout', client.JOB_WAIT_TIMEOUT)
+        if method == 'select':
+            # jobs.query would otherwise hold the worker until the query finishes
+            options.setdefault('timeout_ms', 0)
+        spec = {
+            'client': client,
+            'method': method,
+            'args': args,
+            'options': options,
+            'priority': priority,
+            'timeout': timeout,
+            'not_before': 0,
+            # a one-shot iterable is exhausted by the first attempt, so the job cannot be resubmitted
+            'replayable': not any([hasattr(arg, '__iter__') and iter(arg) is arg for arg in args]),
+            'deadline': None,
+            'future': JobFuture(),
+        }
+        with self.condition:
+            if self.closed:
+                raise BigQueryError('Scheduler is closed')
+            self.push(spec)
+            self.futures.append(spec['future'])
+            self.condition.notify_all()
+        return spec['future']
+
+    def load(self, *args, **options):
+        return self.submit('load', *args, **options)
+
+    def insert_from_select(self, *args, **options):
+        return self.submit('insert_from_select', *args, **options)
+
+    def extract(self, *args, **options):
+        return self.submit('extract', *args, **options)
+
+    def select(self, *args, **options):
+        return self.submit('select', *args, **options)
+
+    def push(self, spec):
+        # INTERACTIVE jobs go first, and jobs of the same priority keep their order
+        heapq.heappush(self.pending, (Scheduler.PRIORITIES.index(spec['priority']), next(self.counter), spec))
+
+    def dispatch(self):
+        now = time.time()
+        (deferred, wakeup) = ([], None)
+        while self.pending:
+            entry = heapq.heappop(self.pending)
+            spec = entry[2]
+            project_id = spec['client'].project_id
+            if spec['not_before'] > now:
+                wakeup = min(wakeup or spec['not_before'], spec['not_before'])
+                deferred.append(entry)
+            elif self.counts.get(project_id, 0) >= self.max_jobs:
+                deferred.append(entry)
+            else:
+                self.counts[project_id] = self.counts.get(project_id, 0) + 1
+                spec['job_id'] = None
+                self.running.append(spec)
+                self.pool.apply_async(self.start, (spec,))
+        for entry in deferred:
+            heapq.heappush(self.pending, entry)
+        return wakeup
+
+    def start(self, spec):
+        spec['future'].attempts += 1
+        options = dict(spec['options'])
+        options['async'] = True
+        if 'job_id' in options and spec['future'].attempts > 1:
+            # the failed job keeps its ID, so the resubmitted one needs a new one
+            options['job_id'] = '%s_%d' % (options['job_id'], spec['future'].attempts)
+        try:
+            job_id = getattr(spec['client'], spec['method'])(*spec['args'], **options)
+        except Exception as e:
+            self.finish(spec, error=e)
+            return
+        with self.condition:
+            (spec['job_id'], spec['future'].job_id) = (job_id, job_id)
+            spec['deadline'] = time.time() + spec['timeout']
+            self.condition.notify_all()
+
+    def fetch(self, spec):
+        try:
+            value = spec['client'].get_query_results(spec['job_id'],
+                typed=spec['options'].get('typed', False), output=spec['options'].get('output', 'rows'))
+        except Exception as e:
+            self.resolve(spec['future'], error=e)
+            return
+        self.resolve(spec['future'], value=value)
+
+    def finish(self, spec, value=None, error=None, resubmit=True):
+        with self.condition:
+            self.running.remove(spec)
+            self.counts[spec['client'].project_id] -= 1
+            if resubmit and spec['replayable'] and error is not None and self.is_retryable(error) \
+                and spec['future'].attempts < self.max_attempts:
+                spec['not_before'] = time.time() + self.retry_delay * (2 ** (spec['future'].attempts - 1))
+                self.push(spec)
+                error = None
+                resubmitted = True
+            else:
+                resubmitted = False
+            self.condition.notify_all()
+        if resubmitted:
+            return
+        if error is None and spec['method'] == 'select':
+            self.pool.apply_async(self.fetch, (spec,))
+        else:
+            self.resolve(spec['future'], value=value, error=error)
+
+    def resolve(self, future, value=None, error=None):
+        (future.value, future.error) = (value, error)
+        future.event.set()
+        with self.condition:
+            self.condition.notify_all()
+
+    def is_retryable(self, error):
+        cause = error.args[0] if error.args else None
+        if isinstance(cause, HttpError):
+            reasons = [RetryPolicy.reason(cause)]
+        elif type(cause) is ListType:
+            # errors of a failed job or of jobs.query
+            reasons = [x.get('reason') for x in cause if type(x) is DictionaryType]
+        elif type(cause) is DictionaryType:
+            reasons = [cause.get('reason')]
+        else:
+            reasons = []
+        return any(reason in Scheduler.RETRYABLE_REASONS for reason in reasons)
+
+    def poll(self, specs):
+        clients = {}
+        for spec in specs:
+            clients.setdefault(id(spec['client']), (spec['client'], []))[1].append(spec)
+        for (client, client_specs) in clients.values():
+            try:
+                polled = client.poll_jobs([spec['job_id'] for spec in client_specs])
+            except Exception as e:
+                # retryable failures are handled by poll_jobs(), so the jobs cannot be polled
+                for spec in client_specs:
+                    self.finish(spec, error=e, resubmit=False)
+                continue
+            now = time.time()
+            for (spec, (job_id, result)) in zip(client_specs, polled):
+                if result.error is not None:
+                    # a failed poll keeps the job in flight, since it may still be running
+                    running = client.is_retryable_poll_error(result.error)
+                else:
+                    running = result.value['status']['state'] != 'DONE'
+                if running:
+                    if now >= spec['deadline']:
+                        self.finish(spec, error=JobWaitTimeoutError('timeout: ' + str(spec['timeout']) + 'sec'), resubmit=False)
+                    continue
+                # only the errors of the finished job are resubmitted, not those of jobs.get
+                self.finish(spec, value=result.value, error=result.error, resubmit=isinstance(result.error, BigQueryError))
+
+    def run(self):
+        while True:
+            with self.condition:
+                wakeup = self.dispatch()
+                specs = [spec for spec in self.running if spec['job_id'] is not None]
+                if not specs:
+                    if self.closed and not self.pending and not self.running:
+                        return
+                    self.condition.wait(max(wakeup - time.time(), 0.001) if wakeup is not None else None)
+                    continue
+            self.poll(specs)
+            with self.condition:
+                self.condition.wait(self.poll_interval)
+
+    def join(self):
+        with self.condition:
+            (futures, self.futures) = (self.futures, [])
+        for future in futures:
+            future.event.wait()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
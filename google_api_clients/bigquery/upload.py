@@ -0,0 +1,93 @@
+import json
+import zlib
+
+from googleapiclient.http import MediaUpload
+
+class StreamUpload(MediaUpload):
+
+    # resumable chunks must be a multiple of 256 KB
+    CHUNK_SIZE = 8 * 1024 * 1024
+    COMPRESS_LEVEL = 6
+
+    def __init__(self, pieces, **options):
+        self.pieces = iter(pieces)
+        if options.get('compress') is True:
+            self.pieces = self.gzip(self.pieces, options.get('compress_level', StreamUpload.COMPRESS_LEVEL))
+        self._chunksize = options.get('chunk_size', StreamUpload.CHUNK_SIZE)
+        self._mimetype = options.get('mimetype', 'application/octet-stream')
+        self.buffer = ''
+        self.offset = 0
+        self.exhausted = False
+
+    def gzip(self, pieces, level):
+        # wbits 31 writes the gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for piece in pieces:
+            data = compressor.compress(piece)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    def chunksize(self):
+        return self._chunksize
+
+    def mimetype(self):
+        return self._mimetype
+
+    def size(self):
+        # unknown until the stream is exhausted; the last chunk is recognized by a short read
+        return None
+
+    def resumable(self):
+        return True
+
+    def has_stream(self):
+        return False
+
+    def getbytes(self, begin, length):
+        pieces = [self.buffer]
+        available = self.offset + len(self.buffer)
+        while available < begin + length and not self.exhausted:
+            try:
+                piece = next(self.pieces)
+            except StopIteration:
+                self.exhausted = True
+                break
+            pieces.append(piece)
+            available += len(piece)
+        self.buffer = ''.join(pieces)
+        # bytes before begin have been accepted by the server and are released
+        if begin > self.offset:
+            self.buffer = self.buffer[begin - self.offset:]
+            self.offset = begin
+        return self.buffer[:length]
+
+    def to_json(self):
+        raise NotImplementedError('a stream cannot be serialized')
+
+class RowStreamUpload(StreamUpload):
+
+    def __init__(self, rows, **options):
+        super(RowStreamUpload, self).__init__((self.serialize(row) for row in rows), **options)
+
+    def serialize(self, row):
+        if isinstance(row, dict):
+            return json.dumps(row) + '\n'
+        elif isinstance(row, unicode):
+            return row.encode('utf-8') + '\n'
+        return row + '\n'
+
+class FileStreamUpload(StreamUpload):
+
+    BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, filename, **options):
+        super(FileStreamUpload, self).__init__(self.read(filename), **options)
+
+    def read(self, filename):
+        with open(filename, 'rb') as f:
+            while True:
+                block = f.read(FileStreamUpload.BLOCK_SIZE)
+                if not block:
+                    return
+                yield block
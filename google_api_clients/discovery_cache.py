@@ -0,0 +1,88 @@
+import hashlib
+import httplib2
+import json
+import os
+import socket
+import stat
+import tempfile
+import time
+
+from .errors import DiscoveryError
+
+class DiscoveryCache(object):
+
+    # a per-user directory, because the document decides the host that receives the access token
+    DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'google_api_clients', 'discovery')
+    TTL = 86400
+
+    def __init__(self, **options):
+        self.directory = options.get('directory') or DiscoveryCache.DIRECTORY
+        self.ttl = options.get('ttl', DiscoveryCache.TTL)
+
+    def path(self, uri):
+        return os.path.join(self.directory, hashlib.md5(uri).hexdigest() + '.json')
+
+    def load(self, path):
+        try:
+            with open(path) as f:
+                if not self.trusted(os.fstat(f.fileno())):
+                    return None
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def trusted(self, st):
+        # a file that another user owns or can write to may point the client at any host
+        if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+            return False
+        return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+    def save(self, path, entry):
+        # write to a temporary file first so that concurrent readers never see a partial document
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory, 0o700)
+            (fd, tmp_path) = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            pass
+
+    def get(self, uri, **options):
+        http = options.get('http') or httplib2.Http()
+        path = self.path(uri)
+
+        entry = self.load(path)
+        if entry is not None and time.time() - os.path.getmtime(path) < self.ttl:
+            return entry['document']
+
+        headers = {}
+        if entry is not None and entry.get('etag'):
+            headers['if-none-match'] = entry['etag']
+
+        try:
+            (resp_headers, content) = http.request(uri, headers=headers)
+        except (httplib2.HttpLib2Error, socket.error) as e:
+            if entry is not None:
+                return entry['document']
+            raise DiscoveryError(e)
+
+        if resp_headers.status == 304 and entry is not None:
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            return entry['document']
+        elif resp_headers.status != 200:
+            if entry is not None:
+                return entry['document']
+            raise DiscoveryError('%s: HTTP %d' % (uri, resp_headers.status))
+
+        document = json.loads(content)
+        self.save(path, {
+            'uri': uri,
+            'etag': resp_headers.get('etag'),
+            'document': document,
+        })
+        return document
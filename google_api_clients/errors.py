@@ -1,3 +1,9 @@
+class BatchError(Exception):
+    pass
+
+class DiscoveryError(Exception):
+    pass
+
 class MethodNameError(Exception):
     pass
 
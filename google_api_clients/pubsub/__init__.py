@@ -6,29 +6,27 @@ from types import ListType
 from googleapiclient.errors import HttpError
 
 from .. import GoogleApiClient
+from ..asynchronous import AsyncClient
 from .errors import AcknowledgeError
 from .errors import AlreadyExistsError
 from .errors import NotFoundError
 
 class PubSub(GoogleApiClient):
 
+    API_NAME = 'pubsub'
+    API_VERSION = 'v1'
     MAX_MESSAGES = 100000
 
     def __init__(self, project_id, **options):
         super(PubSub, self).__init__(project_id=project_id, **options)
-        self.auth().build('pubsub', 'v1')
 
-    def request(self, resource, method, **kwargs):
-        try:
-            res = super(PubSub, self).request(resource, method, **kwargs)
-        except HttpError as e:
-            if e.resp.status == 404 and re.search(r'not found', str(e), re.I):
-                raise NotFoundError(e)
-            elif e.resp.status == 409 and re.search(r'already exists', str(e), re.I):
-                raise AlreadyExistsError(e)
-            else:
-                raise e
-        return res
+    def map_error(self, resource, method, error):
+        if error.resp.status == 404 and re.search(r'not found', str(error), re.I):
+            return NotFoundError(error)
+        elif error.resp.status == 409 and re.search(r'already exists', str(error), re.I):
+            return AlreadyExistsError(error)
+        else:
+            return error
 
     def info_topic(self, topic, **options):
         project_id = options.get('project_id', self.project_id)
@@ -203,3 +201,7 @@ class PubSub(GoogleApiClient):
     def ack(self, subscription, ack_id, **options):
         return self.acknowledge(subscription, ack_id, **options)
 
+class AsyncPubSub(AsyncClient):
+
+    def __init__(self, project_id, **options):
+        super(AsyncPubSub, self).__init__(PubSub(project_id, **options), **options)
@@ -0,0 +1,53 @@
+import datetime
+import httplib2
+import threading
+
+class Registry(object):
+
+    REFRESH_MARGIN = 300
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.refreshing = set()
+
+    def get(self, key, factory):
+        with self.lock:
+            if key not in self.entries:
+                self.entries[key] = [threading.Lock(), None]
+            entry = self.entries[key]
+        # building one entry must not block lookups of the others
+        with entry[0]:
+            if entry[1] is None:
+                entry[1] = factory()
+        return entry[1]
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+
+    def refresh_ahead(self, credentials):
+        token_expiry = getattr(credentials, 'token_expiry', None)
+        if token_expiry is None:
+            return
+        if token_expiry - datetime.datetime.utcnow() > datetime.timedelta(seconds=Registry.REFRESH_MARGIN):
+            return
+        with self.lock:
+            if id(credentials) in self.refreshing:
+                return
+            self.refreshing.add(id(credentials))
+        thread = threading.Thread(target=self.refresh, args=(credentials,))
+        thread.daemon = True
+        thread.start()
+
+    def refresh(self, credentials):
+        try:
+            credentials.refresh(httplib2.Http())
+        except Exception:
+            # the next request refreshes the token itself when the server rejects it
+            pass
+        finally:
+            with self.lock:
+                self.refreshing.discard(id(credentials))
+
+registry = Registry()
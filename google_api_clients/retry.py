@@ -0,0 +1,70 @@
+import httplib2
+import json
+import random
+import socket
+import time
+
+from googleapiclient.errors import HttpError
+
+class RetryPolicy(object):
+
+    MAX_ATTEMPTS = 5
+    BACKOFF_BASE = 1.0
+    BACKOFF_CAP = 32.0
+    DEADLINE = 300
+    RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+    RETRYABLE_REASONS = ('backendError', 'internalError', 'rateLimitExceeded', 'userRateLimitExceeded')
+    IDEMPOTENT_HTTP_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+    IDEMPOTENT_METHODS = (
+        'jobs.cancel',
+        'projects.subscriptions.acknowledge',
+        'projects.subscriptions.modifyAckDeadline',
+    )
+
+    def __init__(self, **options):
+        self.max_attempts = options.get('max_attempts', RetryPolicy.MAX_ATTEMPTS)
+        self.backoff_base = options.get('backoff_base', RetryPolicy.BACKOFF_BASE)
+        self.backoff_cap = options.get('backoff_cap', RetryPolicy.BACKOFF_CAP)
+        self.jitter = options.get('jitter', True)
+        self.deadline = options.get('deadline', RetryPolicy.DEADLINE)
+        self.retryable_statuses = options.get('retryable_statuses', RetryPolicy.RETRYABLE_STATUSES)
+        self.retryable_reasons = options.get('retryable_reasons', RetryPolicy.RETRYABLE_REASONS)
+        self.idempotent_methods = options.get('idempotent_methods', RetryPolicy.IDEMPOTENT_METHODS)
+
+    @staticmethod
+    def reason(error):
+        try:
+            return json.loads(error.content)['error']['errors'][0]['reason']
+        except (ValueError, KeyError, IndexError, TypeError):
+            return None
+
+    def is_idempotent(self, method_id, http_method, kwargs):
+        if http_method in RetryPolicy.IDEMPOTENT_HTTP_METHODS or method_id in self.idempotent_methods:
+            return True
+        body = kwargs.get('body') or {}
+        if method_id == 'jobs.insert':
+            # a job ID makes the server reject the duplicate instead of running the job twice
+            return bool((body.get('jobReference') or {}).get('jobId'))
+        elif method_id == 'tabledata.insertAll':
+            return all('insertId' in row for row in body.get('rows') or [])
+        return False
+
+    def is_retryable_error(self, error):
+        if isinstance(error, HttpError):
+            return error.resp.status in self.retryable_statuses \
+                or RetryPolicy.reason(error) in self.retryable_reasons
+        return isinstance(error, (socket.error, httplib2.HttpLib2Error))
+
+    def backoff(self, retries):
+        delay = min(self.backoff_cap, self.backoff_base * (2 ** retries))
+        if self.jitter:
+            return random.uniform(0, delay)
+        return delay
+
+    def delay(self, retries, error, started):
+        if retries + 1 >= self.max_attempts or not self.is_retryable_error(error):
+            return None
+        delay = self.backoff(retries)
+        if time.time() + delay - started > self.deadline:
+            return None
+        return delay
@@ -0,0 +1,92 @@
+import math
+import threading
+import time
+
+class LatencyHistogram(object):
+
+    MIN_LATENCY = 0.0001
+    GROWTH = 2 ** 0.125
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency):
+        # log-scaled buckets keep memory bounded with a relative error of about 9%
+        index = int(math.ceil(math.log(max(latency, LatencyHistogram.MIN_LATENCY) / LatencyHistogram.MIN_LATENCY, LatencyHistogram.GROWTH)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+
+    def percentile(self, p):
+        if self.count == 0:
+            return None
+        rank = p / 100.0 * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max, LatencyHistogram.MIN_LATENCY * LatencyHistogram.GROWTH ** index)
+        return self.max
+
+    def summary(self):
+        return {
+            'mean': self.total / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+class Stats(object):
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.methods = {}
+
+    def __call__(self, call):
+        self.record(call)
+
+    def record(self, call):
+        with self.lock:
+            if call['method_id'] not in self.methods:
+                self.methods[call['method_id']] = {
+                    'calls': 0,
+                    'errors': 0,
+                    'retries': 0,
+                    'request_bytes': 0,
+                    'response_bytes': 0,
+                    'latency': LatencyHistogram(),
+                }
+            entry = self.methods[call['method_id']]
+            entry['calls'] += 1
+            if call['error'] is not None:
+                entry['errors'] += 1
+            entry['retries'] += call['retries']
+            entry['request_bytes'] += call['request_bytes'] or 0
+            entry['response_bytes'] += call['response_bytes'] or 0
+            entry['latency'].add(call['latency'])
+
+    def summary(self):
+        with self.lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            ret = {}
+            for (method_id, entry) in self.methods.items():
+                ret[method_id] = {
+                    'calls': entry['calls'],
+                    'calls_per_second': entry['calls'] / elapsed,
+                    'errors': entry['errors'],
+                    'retries': entry['retries'],
+                    'request_bytes': entry['request_bytes'],
+                    'response_bytes': entry['response_bytes'],
+                    'latency': entry['latency'].summary(),
+                }
+            return ret
@@ -0,0 +1,20 @@
+import httplib2
+import os
+import threading
+
+class ThreadLocalHttp(object):
+
+    def __init__(self, **options):
+        self.timeout = options.get('timeout')
+        self.local = threading.local()
+
+    def connection(self):
+        # keep-alive connections are neither thread-safe nor safe to share with a forked child
+        pid = os.getpid()
+        if getattr(self.local, 'pid', None) != pid:
+            self.local.pid = pid
+            self.local.http = httplib2.Http(timeout=self.timeout)
+        return self.local.http
+
+    def request(self, *args, **kwargs):
+        return self.connection().request(*args, **kwargs)
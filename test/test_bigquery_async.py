@@ -0,0 +1,40 @@
+import os
+import sys
+import unittest
+from pprint import pprint
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import AsyncBigQuery
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_id = os.getenv('PROJECT_ID')
+        if self.project_id is None:
+            print('PROJECT_ID is not defined.')
+            sys.exit(1)
+        self.bq = AsyncBigQuery(self.project_id, max_workers=4)
+
+    def tearDown(self):
+        self.bq.close()
+
+    def test_normal(self):
+        query = 'SELECT TOP(corpus, %d) as title, COUNT(*) as unique_words ' \
+            + 'FROM [publicdata:samples.shakespeare]'
+        results = [self.bq.select(query % i) for i in range(1, 9)]
+        for (i, result) in enumerate(results):
+            res = result.get()
+            self.assertEqual(i + 1, len(res))
+            pprint(res)
+
+    def test_normal_wait_job(self):
+        query = 'SELECT TOP(corpus, 10) as title, COUNT(*) as unique_words ' \
+            + 'FROM [publicdata:samples.shakespeare]'
+        job_id = self.bq.select(query, async=True).get()
+        res = self.bq.wait_job(job_id).get()
+        self.assertEqual('DONE', res['status']['state'])
+        pprint(res)
+
+if __name__ == '__main__':
+    unittest.main()
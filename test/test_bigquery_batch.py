@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+import unittest
+from pprint import pprint
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import NotFoundError
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_id = os.getenv('PROJECT_ID')
+        self.dataset_id = os.getenv('DATASET_ID', 'test_dataset')
+        self.table_id = os.getenv('TABLE_ID', 'test_table') + '_' + str(int(time.time()))
+        if self.project_id is None:
+            print('PROJECT_ID is not defined.')
+            sys.exit(1)
+        self.bq = BigQuery(self.project_id)
+        if self.bq.exists_dataset(self.dataset_id):
+            self.bq.drop_dataset(self.dataset_id, delete_contents=True)
+        self.bq.create_dataset(self.dataset_id)
+        self.bq.dataset_id = self.dataset_id    # Set default datasetId
+        schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+        ]
+        for i in range(3):
+            self.bq.create_table(self.table_id + '_' + str(i), schema=schema)
+
+    def TearDown(self):
+        self.bq.drop_dataset(self.dataset_id, delete_contents=True)
+
+    def test_normal(self):
+        table_ids = [self.table_id + '_' + str(i) for i in range(3)] + [self.table_id + '_unknown']
+        with self.bq.batch() as batch:
+            results = [batch.request('tables', 'get',
+                projectId=self.project_id, datasetId=self.dataset_id, tableId=table_id)
+                for table_id in table_ids]
+
+        for (table_id, result) in zip(table_ids[:3], results[:3]):
+            res = result.result()
+            self.assertEqual(table_id, res['tableReference']['tableId'])
+            pprint(res)
+
+        with self.assertRaises(NotFoundError):
+            results[3].result()
+
+if __name__ == '__main__':
+    unittest.main()
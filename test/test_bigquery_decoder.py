@@ -0,0 +1,63 @@
+import datetime
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.decoder import RowDecoder
+from google_api_clients.bigquery.decoder import decoders
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'NULLABLE' },
+            { 'name': 'score', 'type': 'FLOAT', 'mode': 'NULLABLE' },
+            { 'name': 'active', 'type': 'BOOLEAN', 'mode': 'NULLABLE' },
+            { 'name': 'created', 'type': 'TIMESTAMP', 'mode': 'NULLABLE' },
+            { 'name': 'birth', 'type': 'RECORD', 'mode': 'NULLABLE', 'fields': [
+                { 'name': 'year', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+                { 'name': 'month', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            ]},
+            { 'name': 'tags', 'type': 'INTEGER', 'mode': 'REPEATED' },
+        ]
+
+    def TearDown(self):
+        pass
+
+    def test_decode(self):
+        rows = [
+            { 'f': [
+                { 'v': '1' }, { 'v': 'foo' }, { 'v': '1.5' }, { 'v': 'true' }, { 'v': '1.4459904E9' },
+                { 'v': { 'f': [ { 'v': '2015' }, { 'v': '10' } ] } },
+                { 'v': [ { 'v': '1' }, { 'v': '2' } ] },
+            ]},
+            { 'f': [
+                { 'v': '2' }, { 'v': None }, { 'v': None }, { 'v': 'false' }, { 'v': None }, { 'v': None }, { 'v': [] },
+            ]},
+        ]
+        res = RowDecoder(self.schema)(rows)
+        self.assertEqual([1, 'foo', 1.5, True, datetime.datetime(2015, 10, 28), { 'year': 2015, 'month': 10 }, [1, 2]], res[0])
+        self.assertEqual([2, None, None, False, None, None, []], res[1])
+
+    def test_cache(self):
+        self.assertIs(decoders.get(self.schema), decoders.get(list(self.schema)))
+
+    def test_select(self):
+        http = FakeBigQueryHttp()
+        bq = BigQuery('fake-project', dataset_id='test_dataset', **http.options())
+        bq.create_dataset('test_dataset')
+        bq.create_table('test_table', schema=self.schema)
+        bq.insert('test_table', [ { 'id': 1, 'name': 'foo', 'active': True, 'birth': { 'year': 2015, 'month': 10 }, 'tags': [3] } ])
+
+        expected = [[1, 'foo', None, True, None, { 'year': 2015, 'month': 10 }, [3]]]
+        self.assertEqual(expected, bq.select('SELECT * FROM test_dataset.test_table', typed=True))
+        self.assertEqual(expected, bq.dump_table('test_table', typed=True))
+        self.assertEqual(expected, bq.dump_table('test_table', typed=True, workers=2))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import BigQueryError
+from google_api_clients.bigquery.errors import Http5xxError
+from google_api_clients.bigquery.errors import NotFoundError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.bigquery.fake import ROOT_URL
+from google_api_clients.retry import RetryPolicy
+
+class BigQueryFakeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_id = 'fake-project'
+        self.dataset_id = 'test_dataset'
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp(max_page_rows=2)
+        self.bq = BigQuery(self.project_id, dataset_id=self.dataset_id,
+            retry=RetryPolicy(backoff_base=0.001), **self.http.options())
+        self.bq.create_dataset(self.dataset_id)
+        schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'REQUIRED' },
+            { 'name': 'url', 'type': 'STRING', 'mode': 'REPEATED' },
+        ]
+        self.bq.create_table(self.table_id, schema=schema)
+
+    def TearDown(self):
+        pass
+
+    def test_table(self):
+        self.assertEqual([self.dataset_id], self.bq.show_datasets())
+        self.assertEqual([self.table_id], self.bq.show_tables())
+        self.assertTrue(self.bq.exists_table(self.table_id))
+        self.bq.drop_table(self.table_id)
+        self.assertFalse(self.bq.exists_table(self.table_id))
+        with self.assertRaises(NotFoundError):
+            self.bq.dump_table(self.table_id)
+
+    def test_insert(self):
+        rows = [
+            { 'id': 1, 'name': 'foo' },
+            { 'id': 2, 'name': 'bar', 'url': ['http://www.google.co.jp/'] },
+            { 'id': 3, 'name': 'baz' },
+        ]
+        self.bq.insert(self.table_id, rows)
+        res = self.bq.dump_table(self.table_id)
+        self.assertEqual(3, len(res))
+        self.assertEqual({ 'f': [ { 'v': '2' }, { 'v': 'bar' }, { 'v': [ { 'v': 'http://www.google.co.jp/' } ] } ] }, res[1])
+
+        with self.assertRaises(BigQueryError):
+            self.bq.insert(self.table_id, [ { 'id': 4, 'name': 'qux', 'unknown': 1 } ])
+
+    def test_select(self):
+        self.bq.insert(self.table_id, [ { 'id': i, 'name': 'name%d' % i } for i in range(5) ])
+        res = self.bq.select('SELECT id, name FROM [%s.%s] LIMIT 3' % (self.dataset_id, self.table_id))
+        self.assertEqual([['0', 'name0'], ['1', 'name1'], ['2', 'name2']], res)
+
+        self.http.add_query_result('SELECT 1', [ { 'name': 'f0_', 'type': 'INTEGER' } ], [ { 'f0_': 1 } ])
+        self.assertEqual([['1']], self.bq.select('SELECT 1'))
+
+    def test_load(self):
+        self.bq.load(self.table_id, [ { 'id': 1, 'name': 'foo' }, { 'id': 2, 'name': 'bar' } ])
+        self.bq.load(self.table_id, ['3,baz'])
+        self.assertEqual(3, len(self.bq.dump_table(self.table_id)))
+
+    def test_resumable_upload(self):
+        (resp, content) = self.http.request(ROOT_URL + 'resumable/upload/bigquery/v2/projects/fake-project/jobs?uploadType=resumable',
+            method='POST', body='{}', headers={ 'content-type': 'application/json' })
+        location = resp['location']
+        (resp, content) = self.http.request(location, method='PUT', body='1,a\n', headers={ 'content-range': 'bytes 0-3/*' })
+        self.assertEqual(308, resp.status)
+        (resp, content) = self.http.request(location, method='PUT', body='', headers={ 'content-range': 'bytes 4-3/4' })
+        self.assertEqual(400, resp.status)
+        (resp, content) = self.http.request(location, method='PUT', headers={ 'content-range': 'bytes */4' })
+        self.assertEqual(200, resp.status)
+
+    def test_error_injection(self):
+        self.http.inject_error('tables.get', status=503, count=2)
+        self.assertTrue(self.bq.exists_table(self.table_id))
+        self.assertEqual(3, self.http.calls['tables.get'])
+
+        self.http.inject_error('tables.get', status=500, count=RetryPolicy.MAX_ATTEMPTS)
+        with self.assertRaises(Http5xxError):
+            self.bq.info_table(self.table_id)
+
+if __name__ == '__main__':
+    unittest.main()
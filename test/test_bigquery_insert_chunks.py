@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import BigQueryError
+from google_api_clients.bigquery.errors import Http4xxError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.retry import RetryPolicy
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset',
+            retry=RetryPolicy(backoff_base=0.001), **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'NULLABLE' },
+        ]
+        self.bq.create_table(self.table_id, schema=schema)
+
+    def TearDown(self):
+        pass
+
+    def test_chunk_rows(self):
+        rows = [ { 'id': i, 'name': 'x' * 100 } for i in range(10) ]
+        chunks = self.bq.chunk_rows(rows, max_rows=4)
+        self.assertEqual([(0, 4), (4, 4), (8, 2)], [(chunk[0][0], len(chunk)) for chunk in chunks])
+        self.assertTrue(all(['insertId' in entry for chunk in chunks for (index, entry) in chunk]))
+
+        chunks = self.bq.chunk_rows(rows, max_bytes=300, insert_id=None)
+        self.assertEqual([(0, 2), (2, 2), (4, 2), (6, 2), (8, 2)], [(chunk[0][0], len(chunk)) for chunk in chunks])
+        self.assertEqual((0, { 'json': rows[0] }), chunks[0][0])
+
+    def test_normal(self):
+        self.http.inject_error('tabledata.insertAll', status=503, count=2)
+        res = self.bq.insert(self.table_id, [ { 'id': i } for i in range(1000) ], max_rows=100)
+        self.assertEqual(10, len(res['chunks']))
+        self.assertEqual(12, self.http.calls['tabledata.insertAll'])
+        # retried chunks are deduplicated by insertId
+        self.assertEqual(1000, len(self.bq.dump_table(self.table_id)))
+
+    def test_chunk_error(self):
+        self.http.inject_error('tabledata.insertAll', status=400, reason='invalid', message='Invalid chunk')
+        res = self.bq.insert(self.table_id, [ { 'id': i } for i in range(1000) ], max_rows=100, workers=1,
+            raise_errors=False)
+        self.assertEqual(900, res['inserted'])
+        self.assertIsInstance(res['chunks'][0]['error'], Http4xxError)
+        self.assertEqual([None] * 9, [chunk['error'] for chunk in res['chunks'][1:]])
+        self.assertEqual(list(range(100)), [error['index'] for error in res['insertErrors']])
+        self.assertEqual('invalid', res['insertErrors'][0]['errors'][0]['reason'])
+        self.assertEqual(900, len(self.bq.dump_table(self.table_id)))
+
+        self.http.inject_error('tabledata.insertAll', status=400, reason='invalid', message='Invalid chunk')
+        with self.assertRaises(Http4xxError):
+            self.bq.insert(self.table_id, [ { 'id': i } for i in range(1000, 1200) ], max_rows=100)
+        self.assertEqual(1000, len(self.bq.dump_table(self.table_id)))
+
+    def test_skip_invalid_rows(self):
+        rows = [ { 'id': i } for i in range(10) ]
+        rows[7] = { 'id': 'seven' }
+        res = self.bq.insert(self.table_id, rows, max_rows=4, skip_invalid_rows=True)
+        self.assertEqual([7], [error['index'] for error in res['insertErrors']])
+
+        with self.assertRaises(BigQueryError):
+            self.bq.insert(self.table_id, rows, max_rows=4)
+
+if __name__ == '__main__':
+    unittest.main()
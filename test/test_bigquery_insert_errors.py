@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import BigQueryError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.retry import RetryPolicy
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset',
+            retry=RetryPolicy(backoff_base=0.001), **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        self.bq.create_table(self.table_id, schema=[ { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' } ])
+        self.rows = [ { 'id': i } for i in range(10) ]
+        self.rows[3] = { 'id': 'three' }
+
+    def TearDown(self):
+        pass
+
+    def test_raise_errors(self):
+        with self.assertRaises(BigQueryError):
+            self.bq.insert(self.table_id, self.rows)
+
+        res = self.bq.insert(self.table_id, self.rows, raise_errors=False)
+        self.assertEqual(0, res['inserted'])
+        self.assertEqual(list(range(10)), [error['index'] for error in res['insertErrors']])
+        self.assertEqual('invalid', res['insertErrors'][3]['errors'][0]['reason'])
+        self.assertEqual('stopped', res['insertErrors'][0]['errors'][0]['reason'])
+
+    def test_max_row_retries(self):
+        res = self.bq.insert(self.table_id, self.rows, max_rows=4, max_row_retries=2, raise_errors=False)
+        self.assertEqual(9, res['inserted'])
+        self.assertEqual(3, res['retried'])
+        self.assertEqual([3], [error['index'] for error in res['insertErrors']])
+        self.assertEqual(9, len(self.bq.dump_table(self.table_id)))
+
+    def test_max_row_retries_without_retry(self):
+        bq = BigQuery('fake-project', dataset_id='test_dataset', retry=None, **self.http.options())
+        res = bq.insert(self.table_id, self.rows, max_row_retries=1, raise_errors=False)
+        self.assertEqual(9, res['inserted'])
+        self.assertEqual(9, res['retried'])
+        self.assertEqual([3], [error['index'] for error in res['insertErrors']])
+
+if __name__ == '__main__':
+    unittest.main()
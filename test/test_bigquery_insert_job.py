@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import AlreadyExistsError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.retry import RetryPolicy
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset',
+            retry=RetryPolicy(backoff_base=0.001), **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        self.bq.create_table('test_table', schema=[ { 'name': 'id', 'type': 'INTEGER' } ])
+
+    def TearDown(self):
+        pass
+
+    def test_reused_job_id(self):
+        res = self.bq.extract('test_table', 'gs://bucket/test_table.csv', job_id='job_1')
+        self.assertEqual('job_1', res['jobReference']['jobId'])
+        with self.assertRaises(AlreadyExistsError):
+            self.bq.extract('test_table', 'gs://bucket/other.csv', job_id='job_1')
+
+    def test_retried_job_id(self):
+        self.bq.extract('test_table', 'gs://bucket/test_table.csv', job_id='job_1')
+        # the job of the failed attempt has been created, so the retry gets Already Exists
+        self.http.inject_error('jobs.insert', status=503)
+        res = self.bq.extract('test_table', 'gs://bucket/test_table.csv', job_id='job_1')
+        self.assertEqual('job_1', res['jobReference']['jobId'])
+        self.assertEqual(3, self.http.calls['jobs.insert'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import BigQueryError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset', **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        self.bq.create_table(self.table_id, schema=[ { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' } ])
+
+    def TearDown(self):
+        pass
+
+    def test_normal(self):
+        with self.bq.inserter(self.table_id, max_rows=100, max_latency=60) as inserter:
+            for i in range(250):
+                inserter.add({ 'id': i })
+            inserter.flush()
+            self.assertEqual(250, len(self.bq.dump_table(self.table_id)))
+            inserter.add({ 'id': 250 })
+        self.assertEqual(251, len(self.bq.dump_table(self.table_id)))
+        self.assertTrue(self.http.calls['tabledata.insertAll'] <= 6)
+
+    def test_max_latency(self):
+        inserter = self.bq.inserter(self.table_id, max_latency=0.05)
+        inserter.add({ 'id': 1 })
+        time.sleep(0.5)
+        self.assertEqual(1, len(self.bq.dump_table(self.table_id)))
+        inserter.close()
+        with self.assertRaises(BigQueryError):
+            inserter.add({ 'id': 2 })
+
+    def test_backpressure(self):
+        self.http.latency = 0.2
+        inserter = self.bq.inserter(self.table_id, max_rows=10, max_buffer_rows=10, max_latency=60)
+        for i in range(10):
+            inserter.add({ 'id': i })
+        # the first 10 rows are in flight, so the buffer is empty again
+        time.sleep(0.1)
+        for i in range(10, 20):
+            inserter.add({ 'id': i })
+        started = time.time()
+        inserter.add({ 'id': 20 })
+        self.assertTrue(time.time() - started >= 0.05)
+        inserter.close()
+        self.assertEqual(21, len(self.bq.dump_table(self.table_id)))
+
+    def test_error(self):
+        inserter = self.bq.inserter(self.table_id)
+        inserter.add({ 'id': 'one' })
+        with self.assertRaises(BigQueryError):
+            inserter.flush()
+        inserter.close()
+
+        errors = []
+        with self.bq.inserter(self.table_id, on_error=lambda e, rows: errors.append(rows)) as inserter:
+            inserter.add({ 'id': 'two' })
+        self.assertEqual([[{ 'id': 'two' }]], errors)
+
+if __name__ == '__main__':
+    unittest.main()
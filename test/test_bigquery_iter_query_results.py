@@ -0,0 +1,44 @@
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import NotFoundError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_id = 'fake-project'
+        self.http = FakeBigQueryHttp(max_page_rows=10)
+        self.bq = BigQuery(self.project_id, **self.http.options())
+        self.query = 'SELECT id FROM numbers'
+        self.http.add_query_result(self.query, [ { 'name': 'id', 'type': 'INTEGER' } ], [ { 'id': i } for i in range(25) ])
+
+    def TearDown(self):
+        pass
+
+    def test_normal(self):
+        job_id = self.bq.select(self.query, async=True)
+        res = self.bq.iter_query_results(job_id, prefetch=1)
+        self.assertIsInstance(res, types.GeneratorType)
+        self.assertEqual([[str(i)] for i in range(25)], list(res))
+
+        self.assertEqual([[str(i)] for i in range(25)], self.bq.get_query_results(job_id))
+        self.assertEqual(job_id, self.bq.get_query_results(job_id, async=True))
+
+    def test_close(self):
+        job_id = self.bq.select(self.query, async=True)
+        res = self.bq.iter_query_results(job_id)
+        self.assertEqual(['0'], next(res))
+        res.close()
+
+    def test_error(self):
+        with self.assertRaises(NotFoundError):
+            list(self.bq.iter_query_results('unknown_job'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_id = 'fake-project'
+        self.dataset_id = 'test_dataset'
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery(self.project_id, dataset_id=self.dataset_id, **self.http.options())
+        self.bq.create_dataset(self.dataset_id)
+        self.bq.create_table(self.table_id, schema=[ { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' } ])
+        self.bq.insert(self.table_id, [ { 'id': i } for i in range(25) ])
+
+    def TearDown(self):
+        pass
+
+    def test_normal(self):
+        res = self.bq.iter_table(self.table_id, max_results=10)
+        self.assertIsInstance(res, types.GeneratorType)
+        self.assertEqual([str(i) for i in range(25)], [row['f'][0]['v'] for row in res])
+        self.assertEqual(3, self.http.calls['tabledata.list'])
+
+    def test_limit(self):
+        res = list(self.bq.iter_table(self.table_id, max_results=10, limit=12))
+        self.assertEqual([str(i) for i in range(12)], [row['f'][0]['v'] for row in res])
+        self.assertEqual(2, self.http.calls['tabledata.list'])
+
+        res = self.bq.dump_table(self.table_id, start_index=20)
+        self.assertEqual([str(i) for i in range(20, 25)], [row['f'][0]['v'] for row in res])
+
+    def test_workers(self):
+        res = list(self.bq.iter_table(self.table_id, workers=4, shard_size=4))
+        self.assertEqual([str(i) for i in range(25)], [row['f'][0]['v'] for row in res])
+        self.assertEqual(7, self.http.calls['tabledata.list'])
+
+        res = self.bq.dump_table(self.table_id, workers=4, shard_size=4, ordered=False, start_index=3, limit=20)
+        self.assertEqual(set([str(i) for i in range(3, 23)]), set([row['f'][0]['v'] for row in res]))
+
+    def test_workers_in_flight(self):
+        res = self.bq.iter_table(self.table_id, workers=2, shard_size=4)
+        self.assertEqual('0', next(res)['f'][0]['v'])
+        time.sleep(0.1)
+        # a slow consumer does not make the other shards be read ahead
+        self.assertEqual(2, self.http.calls['tabledata.list'])
+        self.assertEqual([str(i) for i in range(1, 25)], [row['f'][0]['v'] for row in res])
+
+    def test_workers_without_num_rows(self):
+        table_resource = self.http.table_resource
+        def without_num_rows(*args):
+            resource = table_resource(*args)
+            del resource['numRows']
+            return resource
+        self.http.table_resource = without_num_rows
+        res = self.bq.dump_table(self.table_id, workers=4, shard_size=4, max_results=10)
+        self.assertEqual([str(i) for i in range(25)], [row['f'][0]['v'] for row in res])
+        self.assertEqual(3, self.http.calls['tabledata.list'])
+
+if __name__ == '__main__':
+    unittest.main()
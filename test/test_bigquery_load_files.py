@@ -0,0 +1,105 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import BigQueryError
+from google_api_clients.bigquery.errors import LoadError
+from google_api_clients.bigquery.errors import NotFoundError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset', **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        self.schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'REQUIRED' },
+        ]
+        self.directory = tempfile.mkdtemp()
+        for n in range(5):
+            with open(os.path.join(self.directory, 'data%d.csv' % n), 'w') as f:
+                f.write('id,name\n')
+                for i in range(100):
+                    f.write('%d,name%d\n' % (n * 100 + i, i))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_glob(self):
+        res = self.bq.load(self.table_id, os.path.join(self.directory, '*.csv'), schema=self.schema,
+            skip_leading_rows=1, workers=3)
+        self.assertEqual(5, len(res['jobs']))
+        self.assertEqual('DONE', res['status']['state'])
+        self.assertEqual(500, len(self.bq.dump_table(self.table_id)))
+
+        filenames = [os.path.join(self.directory, 'data%d.csv' % n) for n in range(2)]
+        res = self.bq.load(self.table_id, filenames, schema=self.schema, skip_leading_rows=1,
+            write_disposition='WRITE_TRUNCATE')
+        self.assertEqual(200, len(self.bq.dump_table(self.table_id)))
+
+    def test_inline_data(self):
+        schema = [ { 'name': 'a', 'type': 'STRING' }, { 'name': 'b', 'type': 'STRING', 'mode': 'REPEATED' } ]
+        res = self.bq.load(self.table_id, '{"a": "x", "b": ["1"]}\n{"a": "y", "b": []}\n', schema=schema,
+            source_format='NEWLINE_DELIMITED_JSON')
+        self.assertEqual('DONE', res['status']['state'])
+        res = self.bq.load(self.table_id, '{"a": "z", "b": ["2", "3"]}', schema=schema,
+            source_format='NEWLINE_DELIMITED_JSON')
+        self.assertEqual('DONE', res['status']['state'])
+        self.assertEqual(3, len(self.bq.dump_table(self.table_id)))
+
+        self.bq.load('csv_table', 'what?,ok', schema=[ { 'name': 'x', 'type': 'STRING' }, { 'name': 'y', 'type': 'STRING' } ])
+        self.assertEqual([['what?', 'ok']], [[x['v'] for x in row['f']] for row in self.bq.dump_table('csv_table')])
+
+        with self.assertRaises(LoadError):
+            self.bq.load(self.table_id, os.path.join(self.directory, '*.tsv'), glob=True)
+
+    def test_shard_size(self):
+        filename = os.path.join(self.directory, 'data0.csv')
+        shards = self.bq.shard_file(filename, 300)
+        self.assertEqual(os.path.getsize(filename), shards[-1][1])
+        with open(filename) as f:
+            content = f.read()
+        for (start, end) in shards:
+            self.assertEqual('\n', content[end - 1])
+
+        res = self.bq.load(self.table_id, filename, schema=self.schema, skip_leading_rows=1, shard_size=300)
+        self.assertEqual(len(shards), len(res['jobs']))
+        rows = self.bq.dump_table(self.table_id, typed=True)
+        self.assertEqual(list(range(100)), sorted([row[0] for row in rows]))
+
+    def test_error(self):
+        self.http.inject_error('jobs.insert', status=404, reason='notFound', message='Not Found: Table')
+        res = self.bq.load(self.table_id, os.path.join(self.directory, '*.csv'), schema=self.schema,
+            skip_leading_rows=1, raise_errors=False)
+        self.assertEqual(1, len(res['errors']))
+        self.assertIsInstance(res['errors'][0]['error'], NotFoundError)
+        self.assertEqual(400, len(self.bq.dump_table(self.table_id)))
+
+    def test_first_part_error(self):
+        filenames = [os.path.join(self.directory, 'data%d.csv' % n) for n in range(3)]
+        self.bq.load(self.table_id, filenames[0], schema=self.schema, skip_leading_rows=1)
+        with self.assertRaises(BigQueryError):
+            self.bq.load(self.table_id, filenames, schema=self.schema, skip_leading_rows=1,
+                write_disposition='WRITE_EMPTY')
+        res = self.bq.load(self.table_id, filenames, schema=self.schema, skip_leading_rows=1,
+            write_disposition='WRITE_EMPTY', raise_errors=False)
+        self.assertEqual(3, len(res['errors']))
+        self.assertIsInstance(res['errors'][1]['error'], LoadError)
+        self.assertEqual(100, len(self.bq.dump_table(self.table_id)))
+
+    def test_missing_file(self):
+        filenames = [os.path.join(self.directory, 'data0.csv'), os.path.join(self.directory, 'missing.csv')]
+        with self.assertRaises(LoadError):
+            self.bq.load(self.table_id, filenames, schema=self.schema, skip_leading_rows=1)
+        self.assertEqual(0, self.http.calls.get('jobs.insert', 0))
+
+if __name__ == '__main__':
+    unittest.main()
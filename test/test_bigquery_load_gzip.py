@@ -0,0 +1,55 @@
+import gzip
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+from StringIO import StringIO
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.bigquery.upload import FileStreamUpload
+from google_api_clients.bigquery.upload import StreamUpload
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset', **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        self.schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'REQUIRED' },
+        ]
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'data.csv')
+        with open(self.filename, 'w') as f:
+            for i in range(10000):
+                f.write('%d,name%d\n' % (i, i))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_upload(self):
+        upload = FileStreamUpload(self.filename, compress=True)
+        content = upload.getbytes(0, os.path.getsize(self.filename))
+        self.assertTrue(len(content) < os.path.getsize(self.filename) / 3)
+        with open(self.filename) as f:
+            self.assertEqual(f.read(), gzip.GzipFile(fileobj=StringIO(content)).read())
+
+        # a resumed upload skips the bytes the server already has
+        upload = StreamUpload(['0123456789'] * 3)
+        self.assertEqual('56789012', upload.getbytes(15, 8))
+
+    def test_load(self):
+        self.bq.load(self.table_id, self.filename, schema=self.schema, gzip=True)
+        self.bq.load(self.table_id, ({ 'id': i, 'name': 'foo' } for i in range(10)), gzip=True)
+        self.bq.load(self.table_id, '1,foo\n2,bar', gzip=True)
+        self.assertEqual(10012, len(self.bq.dump_table(self.table_id)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.retry import RetryPolicy
+
+class Interrupted(Exception):
+    pass
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset',
+            retry=RetryPolicy(backoff_base=0.001), **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        self.schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'REQUIRED' },
+        ]
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, 'data.csv')
+        with open(self.filename, 'w') as f:
+            for i in range(1000):
+                f.write('%d,name%d\n' % (i, i))
+        self.size = os.path.getsize(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_progress(self):
+        self.http.inject_error('jobs.insert.upload', status=503, count=2)
+        progress = []
+        res = self.bq.load(self.table_id, self.filename, schema=self.schema, chunk_size=1024,
+            progress=lambda uploaded, total: progress.append((uploaded, total)))
+        self.assertEqual('DONE', res['status']['state'])
+        self.assertEqual((1024, self.size), progress[0])
+        self.assertEqual((self.size, self.size), progress[-1])
+        self.assertEqual(1000, len(self.bq.dump_table(self.table_id)))
+
+    def test_session_file(self):
+        session_file = os.path.join(self.directory, 'data.csv.session')
+        def interrupt(uploaded, total):
+            if uploaded >= 4096:
+                raise Interrupted()
+        with self.assertRaises(Interrupted):
+            self.bq.load(self.table_id, self.filename, schema=self.schema, chunk_size=1024,
+                session_file=session_file, progress=interrupt)
+        self.assertTrue(os.path.exists(session_file))
+        calls = self.http.calls['jobs.insert.upload']
+
+        self.bq.load(self.table_id, self.filename, schema=self.schema, chunk_size=1024, session_file=session_file)
+        self.assertFalse(os.path.exists(session_file))
+        # the second upload starts at the fifth chunk, after a status request
+        chunks = (self.size + 1023) // 1024
+        self.assertEqual(calls + 1 + chunks - 4, self.http.calls['jobs.insert.upload'])
+        self.assertEqual(1000, len(self.bq.dump_table(self.table_id)))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import LoadError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.bigquery.upload import RowStreamUpload
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table_id = 'test_table'
+        self.http = FakeBigQueryHttp()
+        self.bq = BigQuery('fake-project', dataset_id='test_dataset', **self.http.options())
+        self.bq.create_dataset('test_dataset')
+        self.schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'REQUIRED' },
+        ]
+
+    def TearDown(self):
+        pass
+
+    def test_upload(self):
+        upload = RowStreamUpload(({ 'id': i } for i in range(3)), chunk_size=10)
+        self.assertIsNone(upload.size())
+        self.assertEqual('{"id": 0}\n', upload.getbytes(0, 10))
+        self.assertEqual('{"id": 1}\n', upload.getbytes(10, 10))
+        self.assertEqual('{"id": 1}\n', upload.getbytes(10, 10))
+        self.assertEqual('{"id": 2}\n', upload.getbytes(20, 10))
+        self.assertEqual('', upload.getbytes(30, 10))
+
+    def test_chunk_boundary(self):
+        # 512 rows of 1 KB end exactly on the second chunk
+        rows = ('%06d,%s' % (i, 'x' * 1016) for i in range(512))
+        res = self.bq.load(self.table_id, rows, schema=self.schema, chunk_size=256 * 1024)
+        self.assertEqual('DONE', res['status']['state'])
+        self.assertEqual(3, self.http.calls['jobs.insert.upload'])
+        self.assertEqual(512, len(self.bq.dump_table(self.table_id)))
+
+    def test_generator(self):
+        rows = ({ 'id': i, 'name': 'name%d' % i } for i in range(20000))
+        res = self.bq.load(self.table_id, rows, schema=self.schema, chunk_size=256 * 1024)
+        self.assertEqual('DONE', res['status']['state'])
+        self.assertTrue(self.http.calls['jobs.insert.upload'] > 1)
+        self.assertEqual(20000, len(self.bq.dump_table(self.table_id)))
+
+    def test_list(self):
+        self.bq.load(self.table_id, [ { 'id': 1, 'name': 'foo' }, { 'id': 2, 'name': 'bar' } ], schema=self.schema)
+        self.bq.load(self.table_id, iter(['3,baz', u'4,qux']))
+        self.assertEqual(4, len(self.bq.dump_table(self.table_id)))
+
+    def test_dict(self):
+        with self.assertRaises(LoadError):
+            self.bq.load(self.table_id, { 'id': 1, 'name': 'foo' }, schema=self.schema)
+        self.assertEqual(0, self.http.calls.get('jobs.insert', 0))
+
+if __name__ == '__main__':
+    unittest.main()
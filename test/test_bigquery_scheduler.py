@@ -0,0 +1,109 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import BigQueryError
+from google_api_clients.bigquery.errors import Http4xxError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset_id = 'test_dataset'
+        self.http = FakeBigQueryHttp(job_duration=0.2)
+        self.bq = BigQuery('fake-project', dataset_id=self.dataset_id, **self.http.options())
+        self.bq.create_dataset(self.dataset_id)
+        self.bq.create_table('src', schema=[ { 'name': 'id', 'type': 'INTEGER' } ])
+        self.bq.insert('src', [ { 'id': i } for i in range(3) ])
+        self.query = 'SELECT id FROM test_dataset.src'
+        self.scheduler = self.bq.scheduler(max_jobs=2, poll_interval=0.05, retry_delay=0.05)
+
+    def tearDown(self):
+        self.scheduler.close()
+
+    def created(self, future):
+        return self.http.jobs[('fake-project', future.job_id)]['created']
+
+    def test_normal(self):
+        futures = [self.scheduler.insert_from_select('dest_%d' % i, self.query) for i in range(6)]
+        for future in futures:
+            self.assertEqual('DONE', future.result(5)['status']['state'])
+        self.assertEqual(7, len(self.bq.show_tables()))
+
+        # no more than two jobs run at a time
+        jobs = self.http.jobs.values()
+        for job in jobs:
+            self.assertTrue(len([x for x in jobs if x['created'] <= job['created'] < x['done_at']]) <= 2)
+
+    def test_priority(self):
+        self.scheduler.close()
+        self.scheduler = self.bq.scheduler(max_jobs=1, poll_interval=0.05)
+        first = self.scheduler.insert_from_select('dest_0', self.query)
+        batch = self.scheduler.insert_from_select('dest_1', self.query, priority='BATCH')
+        interactive = self.scheduler.insert_from_select('dest_2', self.query)
+        self.scheduler.join()
+        self.assertTrue(self.created(first) < self.created(interactive) < self.created(batch))
+        self.assertEqual('BATCH', self.http.jobs[('fake-project', batch.job_id)]['resource']['configuration']['query']['priority'])
+
+    def test_select(self):
+        future = self.scheduler.select(self.query)
+        self.assertEqual([['0'], ['1'], ['2']], future.result(5))
+
+    def test_retry(self):
+        self.http.inject_error('jobs.insert', status=403, reason='rateLimitExceeded', message='Exceeded rate limits')
+        self.http.inject_job_error('quotaExceeded', message='Quota exceeded')
+        future = self.scheduler.extract('src', 'gs://bucket/src.csv')
+        self.assertEqual('DONE', future.result(5)['status']['state'])
+        self.assertEqual(3, future.attempts)
+
+    def test_retry_iterator(self):
+        self.http.inject_job_error('quotaExceeded', message='Quota exceeded')
+        rows = iter([ { 'id': i } for i in range(3) ])
+        future = self.scheduler.load('dest', rows, schema=[ { 'name': 'id', 'type': 'INTEGER' } ])
+        with self.assertRaises(BigQueryError) as cm:
+            future.result(5)
+        self.assertEqual('quotaExceeded', cm.exception.args[0][0]['reason'])
+        self.assertEqual(1, future.attempts)
+
+        self.http.inject_job_error('quotaExceeded', message='Quota exceeded')
+        future = self.scheduler.load('dest', [ { 'id': i } for i in range(3) ], schema=[ { 'name': 'id', 'type': 'INTEGER' } ])
+        self.assertEqual('DONE', future.result(5)['status']['state'])
+        self.assertEqual(2, future.attempts)
+
+    def test_error(self):
+        future = self.scheduler.insert_from_select('dest', 'SELECT x FROM test_dataset.src')
+        with self.assertRaises(BigQueryError):
+            future.result(5)
+        self.assertEqual(1, future.attempts)
+
+        self.http.inject_error('jobs.insert', status=403, reason='quotaExceeded', count=5, message='Quota exceeded')
+        future = self.scheduler.extract('src', 'gs://bucket/src.csv')
+        with self.assertRaises(Http4xxError):
+            future.result(5)
+        self.assertEqual(5, future.attempts)
+
+    def test_poll_errors(self):
+        self.http.inject_error('jobs.get', status=403, reason='rateLimitExceeded', count=2, message='Exceeded rate limits')
+        self.http.inject_error('jobs.get', status=503, count=2)
+        self.http.inject_error('batch', status=503)
+        future = self.scheduler.load('dest', [ { 'id': 1 } ], schema=[ { 'name': 'id', 'type': 'INTEGER' } ])
+        self.assertEqual('DONE', future.result(5)['status']['state'])
+        self.assertEqual(1, future.attempts)
+        self.assertEqual(1, len(self.http.jobs))
+        self.assertEqual(1, len(self.bq.dump_table('dest')))
+
+    def test_poll_errors_keep_slot(self):
+        self.scheduler.close()
+        self.scheduler = self.bq.scheduler(max_jobs=1, poll_interval=0.05)
+        self.http.inject_error('jobs.get', status=503, count=3)
+        futures = [self.scheduler.insert_from_select('dest_%d' % i, self.query) for i in range(2)]
+        for future in futures:
+            self.assertEqual('DONE', future.result(5)['status']['state'])
+        # the second job is not started while the first one is still running
+        self.assertTrue(self.http.jobs[('fake-project', futures[0].job_id)]['done_at'] <= self.created(futures[1]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+@unittest.skipIf(numpy is None, 'numpy is not installed')
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.http = FakeBigQueryHttp(max_page_rows=2)
+        self.bq = BigQuery('fake-project', **self.http.options())
+        schema = [
+            { 'name': 'id', 'type': 'INTEGER', 'mode': 'REQUIRED' },
+            { 'name': 'parent_id', 'type': 'INTEGER', 'mode': 'NULLABLE' },
+            { 'name': 'name', 'type': 'STRING', 'mode': 'NULLABLE' },
+            { 'name': 'active', 'type': 'BOOLEAN', 'mode': 'REQUIRED' },
+            { 'name': 'created', 'type': 'TIMESTAMP', 'mode': 'NULLABLE' },
+            { 'name': 'tags', 'type': 'STRING', 'mode': 'REPEATED' },
+        ]
+        rows = [
+            { 'id': 1, 'parent_id': None, 'name': 'foo', 'active': True, 'created': 1445990400.5, 'tags': ['a', 'b'] },
+            { 'id': 2, 'parent_id': 1, 'name': None, 'active': False, 'created': None, 'tags': [] },
+            { 'id': 3, 'parent_id': 1, 'name': 'baz', 'active': True, 'created': 0, 'tags': ['c'] },
+        ]
+        self.query = 'SELECT * FROM users'
+        self.http.add_query_result(self.query, schema, rows)
+
+    def TearDown(self):
+        pass
+
+    def test_columns(self):
+        res = self.bq.select(self.query, output='columns')
+        self.assertEqual(['id', 'parent_id', 'name', 'active', 'created', 'tags'], list(res))
+        self.assertEqual('int64', res['id'].dtype)
+        self.assertEqual([1, 2, 3], res['id'].tolist())
+        self.assertTrue(numpy.isnan(res['parent_id'][0]))
+        self.assertEqual([1.0, 1.0], res['parent_id'][1:].tolist())
+        self.assertEqual(['foo', None, 'baz'], res['name'].tolist())
+        self.assertEqual([True, False, True], res['active'].tolist())
+        self.assertEqual(numpy.datetime64('2015-10-28T00:00:00.500000'), res['created'][0])
+        self.assertTrue(numpy.isnat(res['created'][1]))
+        self.assertEqual([['a', 'b'], [], ['c']], res['tags'].tolist())
+
+    @unittest.skipIf(pandas is None, 'pandas is not installed')
+    def test_dataframe(self):
+        res = self.bq.select(self.query, output='dataframe')
+        self.assertEqual((3, 6), res.shape)
+        self.assertEqual([1, 2, 3], res['id'].tolist())
+
+if __name__ == '__main__':
+    unittest.main()
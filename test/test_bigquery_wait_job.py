@@ -0,0 +1,54 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import JobWaitTimeoutError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.http = FakeBigQueryHttp(job_duration=0.5)
+        self.bq = BigQuery('fake-project', **self.http.options())
+        self.query = 'SELECT 1'
+        self.http.add_query_result(self.query, [ { 'name': 'f0_', 'type': 'INTEGER' } ], [ { 'f0_': 1 } ])
+
+    def TearDown(self):
+        pass
+
+    def test_normal(self):
+        job_id = self.bq.select(self.query, async=True, timeout_ms=0)
+        started = time.time()
+        res = self.bq.wait_job(job_id)
+        self.assertEqual('DONE', res['status']['state'])
+        self.assertTrue(time.time() - started < 1.0)
+        # 0.25, 0.5 and so on
+        self.assertTrue(self.http.calls['jobs.get'] <= 4)
+
+    def test_long_poll(self):
+        job_id = self.bq.select(self.query, async=True, timeout_ms=0)
+        res = self.bq.wait_job(job_id, long_poll=True)
+        self.assertEqual('DONE', res['status']['state'])
+        self.assertEqual(1, self.http.calls['jobs.getQueryResults'])
+
+    def test_timeout(self):
+        job_id = self.bq.select(self.query, async=True, timeout_ms=0)
+        with self.assertRaises(JobWaitTimeoutError):
+            self.bq.wait_job(job_id, timeout=0.1)
+        with self.assertRaises(JobWaitTimeoutError):
+            self.bq.wait_job(job_id, timeout=0.1, long_poll=True)
+
+    def test_thread(self):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(self.bq.select(self.query)))
+        thread.start()
+        thread.join()
+        self.assertEqual([[['1']]], results)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import sys
+import time
+import types
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from googleapiclient.errors import HttpError
+from google_api_clients.bigquery import BigQuery
+from google_api_clients.bigquery.errors import BigQueryError
+from google_api_clients.bigquery.errors import JobWaitTimeoutError
+from google_api_clients.bigquery.errors import NotFoundError
+from google_api_clients.bigquery.fake import FakeBigQueryHttp
+from google_api_clients.stats import Stats
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.durations = [0.6, 0.1, 0.3]
+        self.http = FakeBigQueryHttp(job_duration=lambda: self.durations.pop(0) if self.durations else 0)
+        self.bq = BigQuery('fake-project', **self.http.options())
+        self.query = 'SELECT 1'
+        self.http.add_query_result(self.query, [ { 'name': 'f0_', 'type': 'INTEGER' } ], [ { 'f0_': 1 } ])
+
+    def TearDown(self):
+        pass
+
+    def test_normal(self):
+        job_ids = [self.bq.select(self.query, async=True, timeout_ms=0) for i in range(3)]
+        res = self.bq.wait_jobs(job_ids, poll_interval=0.05, max_poll_interval=0.05)
+        self.assertIsInstance(res, types.GeneratorType)
+        res = list(res)
+        self.assertEqual([job_ids[1], job_ids[2], job_ids[0]], [job_id for (job_id, result) in res])
+        for (job_id, result) in res:
+            self.assertIsNone(result.error)
+            self.assertEqual('DONE', result.result()['status']['state'])
+        # every poll gets all the pending jobs in one batch request
+        self.assertTrue(self.http.calls['batch'] <= 20)
+        self.assertTrue(self.http.calls['jobs.get'] < 3 * self.http.calls['batch'])
+
+    def test_timeout(self):
+        job_ids = [self.bq.select(self.query, async=True, timeout_ms=0) for i in range(3)]
+        started = time.time()
+        res = dict(self.bq.wait_jobs(job_ids, timeout={ job_ids[0]: 0.2 }, poll_interval=0.05, max_poll_interval=0.1))
+        self.assertTrue(time.time() - started < 0.6)
+        self.assertIsInstance(res[job_ids[0]].error, JobWaitTimeoutError)
+        self.assertIsNone(res[job_ids[1]].error)
+        self.assertIsNone(res[job_ids[2]].error)
+
+        res = dict(self.bq.wait_jobs([job_ids[0]], timeout=0))
+        self.assertIsInstance(res[job_ids[0]].error, JobWaitTimeoutError)
+
+    def test_error(self):
+        self.durations = [0.1]
+        job_id = self.bq.insert_from_select('dest_table', 'SELECT x FROM unknown', dest_dataset_id='test_dataset', async=True)
+        res = dict(self.bq.wait_jobs([job_id, 'unknown_job']))
+        self.assertIsInstance(res[job_id].error, BigQueryError)
+        self.assertIsInstance(res['unknown_job'].error, NotFoundError)
+        with self.assertRaises(NotFoundError):
+            res['unknown_job'].result()
+
+    def test_poll_errors(self):
+        job_ids = [self.bq.select(self.query, async=True, timeout_ms=0) for i in range(3)]
+        self.http.inject_error('jobs.get', status=403, reason='rateLimitExceeded', count=2, message='Exceeded rate limits')
+        self.http.inject_error('jobs.get', status=429, reason='rateLimitExceeded', message='Too many requests')
+        self.http.inject_error('jobs.get', status=503)
+        self.http.inject_error('batch', status=503)
+        res = dict(self.bq.wait_jobs(job_ids, poll_interval=0.05, max_poll_interval=0.05))
+        for job_id in job_ids:
+            self.assertIsNone(res[job_id].error)
+            self.assertEqual('DONE', res[job_id].value['status']['state'])
+
+        self.http.inject_error('batch', status=400, reason='invalid', message='Invalid batch')
+        with self.assertRaises(HttpError):
+            list(self.bq.wait_jobs(job_ids))
+
+    def test_stats(self):
+        stats = Stats()
+        self.bq.add_hook(after=stats)
+        job_ids = [self.bq.select(self.query, async=True, timeout_ms=0) for i in range(3)]
+        self.http.inject_error('jobs.get', status=503)
+        list(self.bq.wait_jobs(job_ids, poll_interval=0.05, max_poll_interval=0.05))
+        res = stats.summary()
+        self.assertEqual(self.http.calls['jobs.get'], res['jobs.get']['calls'])
+        self.assertEqual(1, res['jobs.get']['errors'])
+
+if __name__ == '__main__':
+    unittest.main()
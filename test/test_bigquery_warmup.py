@@ -0,0 +1,32 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.bigquery import BigQuery
+
+class BigQueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.project_id = os.getenv('PROJECT_ID', 'test_project')
+
+    def TearDown(self):
+        pass
+
+    def test_normal_lazy(self):
+        # nothing is read or fetched until the first request
+        bq = BigQuery(self.project_id, service_account='nobody', private_key='/nonexistent/key.p12')
+        self.assertEqual(None, bq.methods)
+        with self.assertRaises(IOError):
+            bq.warmup()
+
+    def test_normal_warmup(self):
+        if os.getenv('PROJECT_ID') is None:
+            self.skipTest('PROJECT_ID is not defined.')
+        bq = BigQuery(self.project_id).warmup()
+        self.assertTrue(bool(bq.methods))
+        self.assertIsInstance(bq.show_datasets(), list)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import httplib2
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.discovery_cache import DiscoveryCache
+from google_api_clients.errors import DiscoveryError
+
+class StubHttp(object):
+
+    def __init__(self, status, content='', etag=None):
+        self.status = status
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def request(self, uri, headers=None):
+        self.requests.append(headers or {})
+        resp = httplib2.Response({ 'status': self.status })
+        if self.etag is not None:
+            resp['etag'] = self.etag
+        return (resp, self.content)
+
+class DiscoveryCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.uri = 'https://www.googleapis.com/discovery/v1/apis/bigquery/v2/rest'
+        self.document = { 'name': 'bigquery', 'version': 'v2', 'resources': {} }
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_normal(self):
+        cache = DiscoveryCache(directory=self.directory)
+        http = StubHttp(200, json.dumps(self.document), etag='"abc"')
+        self.assertEqual(self.document, cache.get(self.uri, http=http))
+        self.assertEqual(self.document, cache.get(self.uri, http=http))
+        self.assertEqual(1, len(http.requests))
+
+    def test_normal_revalidate(self):
+        cache = DiscoveryCache(directory=self.directory, ttl=0)
+        http = StubHttp(200, json.dumps(self.document), etag='"abc"')
+        cache.get(self.uri, http=http)
+
+        http = StubHttp(304)
+        self.assertEqual(self.document, cache.get(self.uri, http=http))
+        self.assertEqual('"abc"', http.requests[0]['if-none-match'])
+
+    def test_normal_stale(self):
+        cache = DiscoveryCache(directory=self.directory, ttl=0)
+        http = StubHttp(200, json.dumps(self.document))
+        cache.get(self.uri, http=http)
+
+        http = StubHttp(503)
+        self.assertEqual(self.document, cache.get(self.uri, http=http))
+
+    def test_untrusted(self):
+        cache = DiscoveryCache(directory=self.directory)
+        http = StubHttp(200, json.dumps(self.document))
+        cache.get(self.uri, http=http)
+        os.chmod(cache.path(self.uri), 0o666)
+        self.assertEqual(self.document, cache.get(self.uri, http=http))
+        self.assertEqual(2, len(http.requests))
+        self.assertEqual(0o600, os.stat(cache.path(self.uri)).st_mode & 0o777)
+
+    def test_directory(self):
+        self.assertTrue(DiscoveryCache.DIRECTORY.startswith(os.path.expanduser('~')))
+        directory = os.path.join(self.directory, 'discovery')
+        cache = DiscoveryCache(directory=directory)
+        cache.get(self.uri, http=StubHttp(200, json.dumps(self.document)))
+        self.assertEqual(0o700, os.stat(directory).st_mode & 0o777)
+
+    def test_error(self):
+        cache = DiscoveryCache(directory=self.directory)
+        with self.assertRaises(DiscoveryError):
+            cache.get(self.uri, http=StubHttp(404))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import datetime
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.registry import Registry
+
+class StubCredentials(object):
+
+    def __init__(self, expires_in):
+        self.token_expiry = datetime.datetime.utcnow() + datetime.timedelta(seconds=expires_in)
+        self.refreshed = threading.Event()
+
+    def refresh(self, http):
+        self.refreshed.set()
+
+class RegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def TearDown(self):
+        pass
+
+    def test_get(self):
+        calls = []
+        factory = lambda: calls.append(1) or object()
+        entry = self.registry.get(('service', 'bigquery', 'v2'), factory)
+        self.assertIs(entry, self.registry.get(('service', 'bigquery', 'v2'), factory))
+        self.assertIsNot(entry, self.registry.get(('service', 'pubsub', 'v1'), factory))
+        self.assertEqual(2, len(calls))
+
+    def test_refresh_ahead(self):
+        credentials = StubCredentials(Registry.REFRESH_MARGIN - 60)
+        self.registry.refresh_ahead(credentials)
+        self.assertTrue(credentials.refreshed.wait(5))
+
+        credentials = StubCredentials(Registry.REFRESH_MARGIN + 600)
+        self.registry.refresh_ahead(credentials)
+        self.assertFalse(credentials.refreshed.wait(0.1))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import httplib2
+import json
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from googleapiclient.errors import HttpError
+
+from google_api_clients.retry import RetryPolicy
+
+def http_error(status, reason):
+    content = json.dumps({ 'error': { 'code': status, 'errors': [ { 'reason': reason } ] } })
+    return HttpError(httplib2.Response({ 'status': status }), content)
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.retry = RetryPolicy(max_attempts=3, backoff_base=1, backoff_cap=4, jitter=False)
+
+    def test_is_idempotent(self):
+        self.assertTrue(self.retry.is_idempotent('tables.get', 'GET', {}))
+        self.assertTrue(self.retry.is_idempotent('jobs.cancel', 'POST', {}))
+        self.assertFalse(self.retry.is_idempotent('jobs.insert', 'POST', { 'body': {} }))
+        self.assertTrue(self.retry.is_idempotent('jobs.insert', 'POST',
+            { 'body': { 'jobReference': { 'jobId': 'job_1' } } }))
+        self.assertFalse(self.retry.is_idempotent('tabledata.insertAll', 'POST',
+            { 'body': { 'rows': [ { 'json': {} } ] } }))
+        self.assertTrue(self.retry.is_idempotent('tabledata.insertAll', 'POST',
+            { 'body': { 'rows': [ { 'json': {}, 'insertId': '1' } ] } }))
+
+    def test_is_retryable_error(self):
+        self.assertTrue(self.retry.is_retryable_error(http_error(503, 'backendError')))
+        self.assertTrue(self.retry.is_retryable_error(http_error(403, 'rateLimitExceeded')))
+        self.assertFalse(self.retry.is_retryable_error(http_error(403, 'accessDenied')))
+        self.assertFalse(self.retry.is_retryable_error(http_error(404, 'notFound')))
+
+    def test_delay(self):
+        error = http_error(500, 'backendError')
+        started = time.time()
+        self.assertEqual(1, self.retry.delay(0, error, started))
+        self.assertEqual(2, self.retry.delay(1, error, started))
+        self.assertEqual(None, self.retry.delay(2, error, started))
+        self.assertEqual(None, self.retry.delay(0, http_error(400, 'invalid'), started))
+
+    def test_delay_deadline(self):
+        retry = RetryPolicy(backoff_base=10, jitter=False, deadline=5)
+        self.assertEqual(None, retry.delay(0, http_error(500, 'backendError'), time.time()))
+
+    def test_backoff_jitter(self):
+        retry = RetryPolicy(backoff_base=1, backoff_cap=4)
+        for retries in range(10):
+            self.assertTrue(0 <= retry.backoff(retries) <= 4)
+
+if __name__ == '__main__':
+    unittest.main()
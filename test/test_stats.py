@@ -0,0 +1,57 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)) + '/../')
+
+from google_api_clients.stats import LatencyHistogram
+from google_api_clients.stats import Stats
+
+def call(method_id, latency, **options):
+    return {
+        'method_id': method_id,
+        'resource': method_id.split('.')[0],
+        'method': method_id.split('.')[-1],
+        'request_bytes': options.get('request_bytes', 100),
+        'response_bytes': options.get('response_bytes', 1000),
+        'status': options.get('status', 200),
+        'retries': options.get('retries', 0),
+        'latency': latency,
+        'error': options.get('error'),
+    }
+
+class StatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stats = Stats()
+
+    def TearDown(self):
+        pass
+
+    def test_histogram(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 101):
+            histogram.add(i / 100.0)
+        self.assertAlmostEqual(0.50, histogram.percentile(50), delta=0.05)
+        self.assertAlmostEqual(0.95, histogram.percentile(95), delta=0.1)
+        self.assertAlmostEqual(0.99, histogram.percentile(99), delta=0.1)
+        self.assertEqual(1.0, histogram.percentile(100))
+
+    def test_normal(self):
+        for i in range(10):
+            self.stats(call('tabledata.insertAll', 0.2, retries=1))
+        self.stats(call('jobs.get', 0.05, error=Exception('error'), status=500))
+
+        res = self.stats.summary()
+        self.assertEqual(10, res['tabledata.insertAll']['calls'])
+        self.assertEqual(10, res['tabledata.insertAll']['retries'])
+        self.assertEqual(1000, res['tabledata.insertAll']['request_bytes'])
+        self.assertEqual(10000, res['tabledata.insertAll']['response_bytes'])
+        self.assertAlmostEqual(0.2, res['tabledata.insertAll']['latency']['p50'], delta=0.02)
+        self.assertEqual(1, res['jobs.get']['errors'])
+
+        self.stats.reset()
+        self.assertEqual({}, self.stats.summary())
+
+if __name__ == '__main__':
+    unittest.main()